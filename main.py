@@ -3,35 +3,171 @@ import os
 import re
 import sys
 import queue
+import copy
+import shutil
 import base64
 import asyncio
 import threading
 import time
-from datetime import date, datetime
+import math
+import heapq
+import functools
+import importlib.util
+import bisect
+import itertools
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
 from io import BytesIO
 
 import flet as ft
-import matplotlib.pyplot as plt
 import numpy as np
+from matplotlib.figure import Figure
 import qrcode
 import sounddevice as sd
 import soundfile as sf
 from flet import icons
 from flet_contrib.color_picker import ColorPicker
-from PIL import Image
+from PIL import Image, ImageColor
 
 
 def get_audio_devices():
     return sd.query_devices()
 
-def record_audio(fs=44100, device=None):
+class RecordingBuffer:
+    # Chunked float32 arena the input stream callback writes into directly,
+    # so a take is stored once instead of as a list of per-block copies.
+    # Blocks are preallocated off the callback thread by reserve(); the
+    # callback only copies the incoming frames into memory that already exists.
+    def __init__(self, channels=1, block_frames=44100 * 10, spares=2):
+        self.channels = channels
+        self.block_frames = block_frames
+        self.spares = spares
+        self._blocks = [self._new_block()]
+        self._spare = deque(self._new_block() for _ in range(spares))
+        self._used = 0  # Frames used in the last block
+        self._frames = 0
+        self.dropped = 0  # Frames lost because no spare block was ready
+
+    def __len__(self):
+        return self._frames
+
+    def _new_block(self):
+        return np.empty((self.block_frames, self.channels), dtype=np.float32)
+
+    def reserve(self):
+        # Keep spare blocks ready; never called from the audio callback
+        while len(self._spare) < self.spares:
+            self._spare.append(self._new_block())
+
+    def write(self, block):
+        # Views of the frames just written, one per arena block they landed in
+        written = []
+        offset = 0
+        while offset < len(block):
+            if self._used == self.block_frames:
+                if not self._spare:
+                    self.dropped += len(block) - offset
+                    break
+                self._blocks.append(self._spare.popleft())
+                self._used = 0
+            count = min(len(block) - offset, self.block_frames - self._used)
+            target = self._blocks[-1][self._used:self._used + count]
+            target[:] = block[offset:offset + count]
+            written.append(target)
+            self._used += count
+            offset += count
+        self._frames += offset
+        return written
+
+    def to_array(self):
+        # The take without copying it: a view of a single-block take, or a
+        # BlockAudio over the arena blocks. The buffer must not be written to
+        # afterwards.
+        self._spare.clear()
+        if len(self._blocks) == 1:
+            return self._blocks[0][:self._used]
+        return BlockAudio(self._blocks, self._frames)
+
+
+class BlockAudio:
+    # Read-only (frames, channels) float32 audio stored as equally sized
+    # blocks, so a RecordingBuffer arena is used as is instead of joined.
+    # Slices within one block are views; use audio_blocks() or read_frames()
+    # to consume it without copying.
+    ndim = 2
+    dtype = np.dtype(np.float32)
+
+    def __init__(self, blocks, frames):
+        self.blocks = blocks
+        self.block_frames = len(blocks[0])
+        self.shape = (frames, blocks[0].shape[1])
+        self.nbytes = sum(block.nbytes for block in blocks)  # The whole arena stays resident
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        start, stop, _ = key.indices(len(self))
+        if stop <= start:
+            return np.zeros((0, self.shape[1]), dtype=np.float32)
+        first, last = start // self.block_frames, (stop - 1) // self.block_frames
+        offset = first * self.block_frames
+        if first == last:
+            return self.blocks[first][start - offset:stop - offset]
+        return np.concatenate(self.blocks[first:last + 1])[start - offset:stop - offset]
+
+    def __array__(self, dtype=None, copy=None):
+        # A joined copy, for consumers that need one array
+        return np.concatenate(list(audio_blocks(self))).astype(dtype or np.float32, copy=False)
+
+    def read_into(self, position, out):
+        # Copies frames from position into out block by block; returns the count
+        copied = 0
+        while copied < len(out) and position < len(self):
+            block, offset = divmod(position, self.block_frames)
+            count = min(len(out) - copied, self.block_frames - offset, len(self) - position)
+            out[copied:copied + count] = self.blocks[block][offset:offset + count]
+            copied += count
+            position += count
+        return copied
+
+
+def audio_blocks(audio_data):
+    # Contiguous pieces of audio_data in order; a plain array is one piece
+    if not isinstance(audio_data, BlockAudio):
+        yield audio_data
+        return
+    remaining = len(audio_data)
+    for block in audio_data.blocks:
+        if remaining <= 0:
+            break
+        yield block[:remaining]
+        remaining -= len(block)
+
+
+def read_frames(audio_data, position, out):
+    # Copies audio_data[position:] into out without allocating; returns the count
+    if isinstance(audio_data, BlockAudio):
+        return audio_data.read_into(position, out)
+    chunk = audio_data[position:position + len(out)]
+    out[:len(chunk)] = chunk
+    return len(chunk)
+
+
+def record_audio(fs=44100, device=None, buffer=None):
     print(f"Recording... Device: {device}, Sample rate: {fs}")
     q = queue.Queue()
 
     def callback(indata, frames, time, status):
         if status:
             print(status, file=sys.stderr)
-        q.put(indata.copy())
+        if buffer is not None:
+            for written in buffer.write(indata):
+                q.put(written)
+        else:
+            q.put(indata.copy())
     try:
         stream = sd.InputStream(samplerate=fs, device=device, channels=1, callback=callback, dtype='float32')
         with stream:
@@ -39,36 +175,1607 @@ def record_audio(fs=44100, device=None):
                 yield q.get()
     except Exception as e:
         print(f"Error in record_audio: {e}")
-        yield np.zeros((1024, 1))  # Return silent audio if there's an error
+        silence = np.zeros((1024, 1), dtype=np.float32)
+        # Return silent audio if there's an error
+        if buffer is not None:
+            yield from buffer.write(silence)
+        else:
+            yield silence
+
+
+class AudioCodec:
+    # A soundfile container/subtype pair used to store voice note audio
+    def __init__(self, name, format, subtype, extension):
+        self.name = name
+        self.format = format
+        self.subtype = subtype
+        self.extension = extension
+
+    def encode(self, audio_data, fs):
+        # Written piece by piece, so a BlockAudio take is never joined
+        buf = io.BytesIO()
+        channels = audio_data.shape[1] if audio_data.ndim == 2 else 1
+        with sf.SoundFile(buf, mode='w', samplerate=fs, channels=channels, format=self.format, subtype=self.subtype) as f:
+            for block in audio_blocks(audio_data):
+                f.write(block)
+        return buf.getvalue()
+
+    def decode(self, data):
+        audio_data, _ = sf.read(io.BytesIO(data), dtype='float32', always_2d=True)
+        return audio_data
+
 
+AUDIO_CODECS = {
+    "float32": AudioCodec("float32", "WAV", "FLOAT", ".wav"),  # Uncompressed, 4 bytes per sample
+    "pcm16": AudioCodec("pcm16", "WAV", "PCM_16", ".wav"),
+    "flac": AudioCodec("flac", "FLAC", "PCM_16", ".flac"),
+    "vorbis": AudioCodec("vorbis", "OGG", "VORBIS", ".ogg"),
+}
 
-def save_audio(audio_data, filename="recorded_audio.wav", fs=44100):
+
+def save_audio(audio_data, filename="recorded_audio.wav", fs=44100, codec="float32"):
     if audio_data.ndim == 1:
         audio_data = audio_data.reshape(-1, 1)
-    sf.write(filename, audio_data, fs, subtype='FLOAT')
+    codec = AUDIO_CODECS[codec]
+    sf.write(filename, audio_data, fs, format=codec.format, subtype=codec.subtype)
     print(f"Audio saved to {filename}")
 
-def generate_waveform(audio_data, fs=44100):
-    plt.switch_backend('agg')
-    plt.figure(figsize=(5, 1), facecolor='none', edgecolor='none')  # Reduced size
-    plt.plot(np.linspace(0, len(audio_data) / fs, num=len(audio_data)), audio_data, color='#FFA500')  # Orange color
-    plt.axis('off')
-    plt.tight_layout(pad=0)
+def render_waveform(mins, maxs, rms, width=500, height=60, color='#FFA500'):
+    # Rasterize envelope columns into an RGBA image: min/max span, brighter RMS core
+    index = np.arange(width) * len(mins) // width  # Stretch short notes to the full width
+    mins, maxs, rms = mins[index], maxs[index], rms[index]
+    mid = (height - 1) / 2
+    rows = np.arange(height)[:, None]
+    top = np.round(mid - np.clip(maxs, -1, 1) * mid)
+    bottom = np.round(mid - np.clip(mins, -1, 1) * mid)
+    rms_top = np.round(mid - np.clip(rms, 0, 1) * mid)
+    rms_bottom = np.round(mid + np.clip(rms, 0, 1) * mid)
+
+    red, green, blue = ImageColor.getrgb(color)[:3]
+    pixels = np.zeros((height, width, 4), dtype=np.uint8)
+    pixels[..., 0], pixels[..., 1], pixels[..., 2] = red, green, blue
+    pixels[..., 3] = np.where((rows >= top) & (rows <= bottom), 140, 0)
+    pixels[..., 3] = np.where((rows >= rms_top) & (rows <= rms_bottom), 255, pixels[..., 3])
+
     buf = io.BytesIO()
-    plt.savefig(buf, format='png', dpi=100, transparent=True)
-    buf.seek(0)
-    plt.close()
+    Image.fromarray(pixels, 'RGBA').save(buf, format='PNG', compress_level=1)
     return base64.b64encode(buf.getvalue()).decode('utf-8')
 
+
+class PeakPyramid:
+    # Min/max/mean-square peaks at power-of-two decimations, like audiowaveform
+    # .dat files. Level k holds one entry per base_block * 2**k samples, so any
+    # zoom level renders from the nearest level in O(pixels).
+    def __init__(self, audio_data, base_block=64):
+        samples = np.asarray(audio_data, dtype=np.float32).reshape(-1)
+        self.frames = len(samples)
+        self.base_block = base_block
+        if self.frames == 0:
+            samples = np.zeros(1, dtype=np.float32)
+        starts = np.arange(0, len(samples), base_block)
+        counts = np.diff(np.append(starts, len(samples)))
+        mins = np.minimum.reduceat(samples, starts)
+        maxs = np.maximum.reduceat(samples, starts)
+        mean_squares = np.add.reduceat(np.square(samples), starts) / counts
+        self._build_levels(mins, maxs, mean_squares)
+
+    @classmethod
+    def from_base(cls, frames, base_block, mins, maxs, mean_squares):
+        # Pyramid over a base level computed elsewhere, see PeakBuilder
+        pyramid = cls.__new__(cls)
+        pyramid.frames = frames
+        pyramid.base_block = base_block
+        pyramid._build_levels(mins, maxs, mean_squares)
+        return pyramid
+
+    def _build_levels(self, mins, maxs, mean_squares):
+        self.levels = [(mins, maxs, mean_squares)]
+        while len(mins) > 1:
+            if len(mins) % 2:
+                mins, maxs, mean_squares = (np.append(level, level[-1]) for level in (mins, maxs, mean_squares))
+            mins = np.minimum(mins[0::2], mins[1::2])
+            maxs = np.maximum(maxs[0::2], maxs[1::2])
+            mean_squares = (mean_squares[0::2] + mean_squares[1::2]) / 2
+            self.levels.append((mins, maxs, mean_squares))
+
+    def columns(self, width, start=0, end=None):
+        # (min, max, rms) columns for frames [start, end) at the given width
+        end = self.frames if end is None else end
+        samples_per_pixel = max(1, (end - start) / width)
+        level = min(len(self.levels) - 1, max(0, int(np.log2(samples_per_pixel / self.base_block))))
+        block = self.base_block << level
+        mins, maxs, mean_squares = self.levels[level]
+        first = min(start // block, len(mins) - 1)
+        last = max(first + 1, -(-end // block))
+        mins, maxs, mean_squares = mins[first:last], maxs[first:last], mean_squares[first:last]
+        columns = min(width, len(mins))
+        starts = np.linspace(0, len(mins), columns + 1).astype(np.int64)[:-1]
+        counts = np.diff(np.append(starts, len(mins)))
+        return (
+            np.minimum.reduceat(mins, starts),
+            np.maximum.reduceat(maxs, starts),
+            np.sqrt(np.add.reduceat(mean_squares, starts) / counts),
+        )
+
+
+class PeakBuilder:
+    # Accumulates a PeakPyramid's base level chunk by chunk while recording,
+    # so stopping does not have to rescan (or square) the whole take.
+    def __init__(self, base_block=64):
+        self.base_block = base_block
+        self.frames = 0
+        self._pending = np.zeros(0, dtype=np.float32)  # Tail shorter than one block
+        self._mins, self._maxs, self._mean_squares = [], [], []
+
+    def push(self, chunk):
+        samples = np.asarray(chunk, dtype=np.float32).reshape(-1)
+        self.frames += len(samples)
+        samples = np.concatenate((self._pending, samples))
+        whole = len(samples) - len(samples) % self.base_block
+        if whole:
+            blocks = samples[:whole].reshape(-1, self.base_block)
+            self._mins.append(blocks.min(axis=1))
+            self._maxs.append(blocks.max(axis=1))
+            self._mean_squares.append(np.square(blocks).mean(axis=1))
+        self._pending = samples[whole:]
+
+    def finish(self):
+        if len(self._pending):
+            self._mins.append(self._pending.min(keepdims=True))
+            self._maxs.append(self._pending.max(keepdims=True))
+            self._mean_squares.append(np.square(self._pending).mean(keepdims=True))
+            self._pending = self._pending[:0]
+        if not self._mins:
+            return PeakPyramid(self._pending, self.base_block)
+        return PeakPyramid.from_base(
+            self.frames, self.base_block,
+            np.concatenate(self._mins), np.concatenate(self._maxs), np.concatenate(self._mean_squares),
+        )
+
+
+class WaveformCache:
+    # Bounded LRU of rendered waveform PNGs keyed by
+    # (audio id, width, height, color, view start, view end)
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, render):
+        with self._lock:
+            image = self._entries.get(key)
+            if image is not None:
+                self._entries.move_to_end(key)
+                return image
+        image = render()
+        with self._lock:
+            self._entries[key] = image
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return image
+
+
+WAVEFORM_CACHE = WaveformCache()
+WAVEFORM_WIDTH = 240
+WAVEFORM_HEIGHT = 30
+WAVEFORM_COLOR = '#FFA500'
+
+class LiveWaveform:
+    # Scrolling waveform shown while recording. Keeps a ring of per-block peaks
+    # and a reused RGBA pixel buffer to which each block adds a single column.
+    def __init__(self, width=200, height=50, color='#FFA500'):
+        self.width = width
+        self.height = height
+        self.peaks = np.zeros(width, dtype=np.float32)
+        self._head = 0  # Ring index of the next column
+        self._pixels = np.zeros((height, width, 4), dtype=np.uint8)
+        self._pixels[..., :3] = ImageColor.getrgb(color)[:3]
+
+    def reset(self):
+        self.peaks.fill(0)
+        self._pixels[..., 3] = 0
+        self._head = 0
+
+    def push(self, block):
+        peak = min(float(np.abs(block).max()) if len(block) else 0.0, 1.0)
+        mid = (self.height - 1) / 2
+        extent = peak * mid
+        alpha = self._pixels[:, self._head, 3]
+        alpha.fill(0)
+        alpha[int(round(mid - extent)):int(round(mid + extent)) + 1] = 255
+        self.peaks[self._head] = peak
+        self._head = (self._head + 1) % self.width
+
+    def render(self):
+        # Oldest column first, so the newest block is drawn at the right edge
+        pixels = np.concatenate((self._pixels[:, self._head:], self._pixels[:, :self._head]), axis=1)
+        buf = io.BytesIO()
+        Image.fromarray(pixels, 'RGBA').save(buf, format='PNG', compress_level=1)
+        return base64.b64encode(buf.getvalue()).decode('utf-8')
+
+
+class AudioCache:
+    # LRU over decoded voice note PCM that caps the total resident bytes.
+    # Entries are per audio_id, so clones sharing one array are charged once.
+    # Cold notes are evicted back to their encoded, file or spill copy.
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.resident_bytes = 0
+        self._entries = OrderedDict()  # audio_id -> (resident bytes, set of VoiceNotes)
+        self._lock = threading.Lock()
+
+    def touch(self, voice_note, nbytes):
+        evicted = []
+        with self._lock:
+            entry = self._entries.get(voice_note.audio_id)
+            if entry is not None:
+                entry[1].add(voice_note)
+                self._entries.move_to_end(voice_note.audio_id)
+                return
+            if nbytes > self.max_bytes:
+                evicted.append(voice_note)  # Never resident on its own, only used by the caller
+            else:
+                self._entries[voice_note.audio_id] = (nbytes, {voice_note})
+                self.resident_bytes += nbytes
+            while self.resident_bytes > self.max_bytes:
+                cold_id, (cold_bytes, cold_notes) = self._entries.popitem(last=False)
+                self.resident_bytes -= cold_bytes
+                evicted.extend(cold_notes)
+        for cold_note in evicted:
+            cold_note.evict()
+
+    def discard(self, voice_note):
+        with self._lock:
+            entry = self._entries.get(voice_note.audio_id)
+            if entry is None:
+                return
+            nbytes, notes = entry
+            notes.discard(voice_note)
+            if not notes:
+                del self._entries[voice_note.audio_id]
+                self.resident_bytes -= nbytes
+
+
+AUDIO_CACHE = AudioCache()
+AUDIO_SPILL_DIR = os.path.join("recordings", ".cache")
+
+
+def wav_data_offset(path):
+    # Byte offset of the sample data in a RIFF/WAVE file
+    with open(path, "rb") as f:
+        f.seek(12)
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"No data chunk in {path}")
+            size = int.from_bytes(header[4:], "little")
+            if header[:4] == b"data":
+                return f.tell()
+            f.seek(size + size % 2, 1)
+
+
 class VoiceNote:
-    def __init__(self, audio_data, fs):
-        self.audio_data = audio_data
+    _audio_ids = itertools.count(1)
+    _file_refs = Counter()  # Recording or spill file -> live notes sharing it
+    _file_lock = threading.Lock()
+
+    def __init__(self, audio_data, fs, path=None, codec="float32"):
+        self.audio_id = next(VoiceNote._audio_ids)  # Shared by clones, keys WAVEFORM_CACHE
+        self._audio_data = audio_data
+        self.path = path  # Set for notes streamed to disk while recording
+        self.codec = codec  # Storage codec of path / encoded, see AUDIO_CODECS
+        self.encoded = None
+        self.pcm_path = None  # Raw float32 spill file, memory-mapped on load
+        self.storage_size = audio_data.nbytes if audio_data is not None else os.path.getsize(path)
         self.fs = fs
         self.is_playing = False
-        self.playback_position = 0
-        self.duration = len(audio_data) / fs
+        self.is_paused = False
+        self.playback_position = 0  # In frames, advanced by the playback engine
+        self.frames = len(audio_data) if audio_data is not None else sf.info(path).frames
+        self.channels = audio_data.shape[1] if audio_data is not None and audio_data.ndim == 2 else 1
+        self.duration = self.frames / fs
         self.current_time = 0
-        self.start_time = 0
+        self.peaks = None  # PeakPyramid, built once when recording stops
+        self.transcript = ""  # Text attached to the note, covered by task search
+        self.embedding = None  # EmbeddingBuilder vector, see VOICE_SIMILARITY_INDEX
+        self.released = False
+        if path is not None:
+            self._retain_file(path)
+        if audio_data is not None:
+            # A RecordingBuffer view keeps its whole arena alive, so charge for that
+            AUDIO_CACHE.touch(self, getattr(getattr(audio_data, 'base', None), 'nbytes', audio_data.nbytes))
+
+    @property
+    def audio_data(self):
+        return self.load()
+
+    def load(self):
+        audio_data = self._audio_data
+        if audio_data is not None:
+            if not isinstance(audio_data, np.memmap):
+                AUDIO_CACHE.touch(self, audio_data.nbytes)
+            return audio_data
+        # Mapped files are paged in by the OS, so they are not charged against the cache budget
+        if self.path is not None and self.codec == "float32":
+            return np.memmap(self.path, dtype='<f4', mode='r', offset=wav_data_offset(self.path), shape=(self.frames, self.channels))
+        if self.path is not None and self.pcm_path is None:
+            self.share_spill(self.decode_file)
+        if self.pcm_path is not None:
+            return np.memmap(self.pcm_path, dtype=np.float32, mode='r', shape=(self.frames, self.channels))
+        audio_data = AUDIO_CODECS[self.codec].decode(self.encoded)
+        self._audio_data = audio_data
+        AUDIO_CACHE.touch(self, audio_data.nbytes)
+        return audio_data
+
+    def evict(self):
+        audio_data = self._audio_data
+        if audio_data is None:
+            return
+        if self.path is None and self.encoded is None and self.pcm_path is None:
+            # Only copy of the samples, spill it before dropping it
+            def write(out):
+                for block in audio_blocks(audio_data):
+                    np.ascontiguousarray(block, dtype=np.float32).tofile(out)
+            self.share_spill(write)
+        self._audio_data = None
+
+    def decode_file(self, out):
+        # Decode a compressed file block by block into a float32 spill for mapping
+        for block in sf.blocks(self.path, blocksize=65536, dtype='float32', always_2d=True):
+            block.tofile(out)
+
+    def share_spill(self, write):
+        # One spill file per audio_id: the first note to need it calls
+        # write(file), clones evicted or decoded later just map it
+        pcm_path = os.path.join(AUDIO_SPILL_DIR, f"voice_note_{self.audio_id}.f32")
+        with VoiceNote._file_lock:
+            if not VoiceNote._file_refs[pcm_path]:
+                os.makedirs(AUDIO_SPILL_DIR, exist_ok=True)
+                with open(pcm_path, "wb") as out:
+                    write(out)
+            VoiceNote._file_refs[pcm_path] += 1
+        self.pcm_path = pcm_path
+
+    def build_peaks(self):
+        if self.peaks is None:
+            self.peaks = PeakPyramid(self.audio_data)
+        return self.peaks
+
+    def clone(self):
+        # New note sharing this note's audio, peaks and cached waveform renders
+        clone = copy.copy(self)
+        clone.is_playing = False
+        clone.is_paused = False
+        clone.playback_position = 0
+        clone.current_time = 0
+        # Recording and spill files are shared and removed with the last clone
+        for path in (clone.path, clone.pcm_path):
+            if path is not None:
+                clone._retain_file(path)
+        if clone._audio_data is not None:
+            AUDIO_CACHE.touch(clone, clone._audio_data.nbytes)  # Joins this note's entry
+        return clone
+
+    def encode(self, codec):
+        # Replace the raw samples with a compressed copy; a released note has none
+        if self.released or self.path is not None or codec == self.codec:
+            return
+        self.encoded = AUDIO_CODECS[codec].encode(self.audio_data, self.fs)
+        self.drop_samples()
+        self.codec = codec
+        self.storage_size = len(self.encoded)
+
+    def _retain_file(self, path):
+        with VoiceNote._file_lock:
+            VoiceNote._file_refs[path] += 1
+
+    def _release_file(self, path):
+        # Removes the file once no note uses it any more
+        with VoiceNote._file_lock:
+            VoiceNote._file_refs[path] -= 1
+            last = VoiceNote._file_refs[path] <= 0
+            if last:
+                del VoiceNote._file_refs[path]
+        if last and os.path.exists(path):
+            os.remove(path)
+
+    def drop_samples(self):
+        # Drop resident samples and this note's share of the spill file
+        AUDIO_CACHE.discard(self)
+        self._audio_data = None
+        if self.pcm_path is not None:
+            self._release_file(self.pcm_path)
+            self.pcm_path = None
+
+    def release(self):
+        # Called when the note is deleted. Also removes the recording file
+        # once no clone uses it any more
+        self.released = True
+        self.drop_samples()
+        if self.path is not None:
+            self._release_file(self.path)
+            self.path = None
+
+class PlaybackEngine:
+    # One persistent output stream shared by every voice note. The stream
+    # callback copies slices of the active note straight into the output
+    # buffer and advances the note's frame position.
+    def __init__(self, device=None):
+        self.device = device
+        self._stream = None
+        self._stream_fs = None
+        self._note = None
+        self._audio = None
+        self._on_stopped = None
+        self._seeks = deque(maxlen=1)  # (note, frame) for the callback; append/popleft are atomic
+
+    def set_device(self, device):
+        if device != self.device:
+            self.device = device
+            self._close_stream()
+
+    def _ensure_stream(self, fs):
+        if self._stream is not None and self._stream_fs == fs:
+            return
+        self._close_stream()
+        self._stream = sd.OutputStream(
+            samplerate=fs, device=self.device, channels=1, dtype='float32', callback=self._callback
+        )
+        self._stream_fs = fs
+        self._stream.start()
+
+    def _close_stream(self):
+        if self._stream is not None:
+            self._stream.close()
+        self._stream = None
+        self._stream_fs = None
+
+    def play(self, voice_note, on_stopped=None):
+        audio = voice_note.audio_data
+        if audio.ndim == 1:
+            audio = audio.reshape(-1, 1)
+        if voice_note.playback_position >= len(audio):
+            voice_note.playback_position = 0
+        previous, previous_on_stopped = self._note, self._on_stopped
+        if previous is not None and previous is not voice_note:
+            self._note = None
+            previous.is_playing = False
+            previous.is_paused = True
+            if previous_on_stopped:
+                previous_on_stopped(previous)
+        self._ensure_stream(voice_note.fs)
+        self._seeks.clear()  # A seek left over from an earlier play
+        self._audio = audio
+        self._on_stopped = on_stopped
+        voice_note.is_paused = False
+        voice_note.is_playing = True
+        self._note = voice_note
+
+    def seek(self, voice_note, frame):
+        # The callback owns the position of the playing note, so it applies
+        # the seek itself at the start of its next block
+        frame = int(min(max(frame, 0), voice_note.frames - 1))
+        if self._note is voice_note:
+            self._seeks.append((voice_note, frame))
+        else:
+            voice_note.playback_position = frame
+
+    def pause(self, voice_note):
+        if self._note is voice_note:
+            self._note = None
+            self._audio = None
+        voice_note.is_playing = False
+        voice_note.is_paused = True
+
+    def _callback(self, outdata, frames, time, status):
+        if status:
+            print(status, file=sys.stderr)
+        voice_note, audio = self._note, self._audio
+        if voice_note is None or audio is None or not voice_note.is_playing:
+            outdata.fill(0)
+            return
+        try:
+            seek_note, seek_frame = self._seeks.popleft()
+            if seek_note is voice_note:
+                voice_note.playback_position = seek_frame
+        except IndexError:
+            pass
+        position = voice_note.playback_position
+        played = read_frames(audio, position, outdata)
+        outdata[played:] = 0
+        voice_note.playback_position = position + played
+        if voice_note.playback_position >= len(audio):
+            self._note = None
+            self._audio = None  # Do not pin the finished note's samples outside AUDIO_CACHE
+            voice_note.is_playing = False
+            voice_note.is_paused = False
+            voice_note.playback_position = 0
+            if self._on_stopped:
+                self._on_stopped(voice_note)
+
+
+PLAYBACK_ENGINE = PlaybackEngine()
+
+
+@functools.lru_cache(maxsize=8)
+def mel_filterbank(fs, n_fft, n_mels):
+    # Triangular mel filters, shape (n_mels, n_fft // 2 + 1)
+    def hz_to_mel(hz):
+        return 2595 * np.log10(1 + hz / 700)
+
+    def mel_to_hz(mel):
+        return 700 * (10 ** (mel / 2595) - 1)
+
+    edges = mel_to_hz(np.linspace(hz_to_mel(0), hz_to_mel(fs / 2), n_mels + 2))
+    bins = np.fft.rfftfreq(n_fft, 1 / fs)
+    lower, center, upper = edges[:-2, None], edges[1:-1, None], edges[2:, None]
+    rising = (bins - lower) / (center - lower)
+    falling = (upper - bins) / (upper - center)
+    return np.maximum(0, np.minimum(rising, falling)).astype(np.float32)
+
+
+class EmbeddingBuilder:
+    # Unit-length log-mel statistics (per-band mean and std) of a voice note,
+    # accumulated chunk by chunk while recording like PeakBuilder, so the
+    # take never has to be read back (or decoded) to embed it.
+    def __init__(self, fs, n_mels=32, n_fft=1024, hop=512):
+        self.fs = fs
+        self.n_mels = n_mels
+        self.n_fft = n_fft
+        self.hop = hop
+        self._window = np.hanning(n_fft).astype(np.float32)
+        self._pending = np.zeros(0, dtype=np.float32)  # Samples not yet consumed by a whole frame
+        self._frames = 0
+        self._sums = np.zeros(n_mels)
+        self._square_sums = np.zeros(n_mels)
+
+    def push(self, chunk):
+        samples = np.concatenate((self._pending, np.asarray(chunk, dtype=np.float32).reshape(-1)))
+        if len(samples) < self.n_fft:
+            self._pending = samples
+            return
+        frames = np.lib.stride_tricks.sliding_window_view(samples, self.n_fft)[::self.hop]
+        self._add(frames)
+        self._pending = samples[len(frames) * self.hop:]
+
+    def _add(self, frames):
+        spectrum = np.square(np.abs(np.fft.rfft(frames * self._window, axis=1)))
+        log_mel = np.log(spectrum @ mel_filterbank(self.fs, self.n_fft, self.n_mels).T + 1e-10)
+        self._frames += len(log_mel)
+        self._sums += log_mel.sum(axis=0)
+        self._square_sums += np.square(log_mel, dtype=np.float64).sum(axis=0)
+
+    def finish(self):
+        if self._frames == 0:
+            # Shorter than one frame: embed the zero-padded samples
+            self._add(np.pad(self._pending, (0, self.n_fft - len(self._pending)))[None, :])
+        means = self._sums / self._frames
+        stds = np.sqrt(np.maximum(self._square_sums / self._frames - np.square(means), 0))
+        embedding = np.concatenate((means - means.mean(), stds)).astype(np.float32)
+        norm = np.linalg.norm(embedding)
+        return embedding / norm if norm > 0 else embedding
+
+
+class SimilarityIndex:
+    # Compact matrix of unit-length voice note embeddings. The top-k cosine
+    # neighbours of a note are a single matrix-vector product over the rows.
+    def __init__(self, dim=64, capacity=64):
+        self._matrix = np.zeros((capacity, dim), dtype=np.float32)
+        self._audio_ids = np.zeros(capacity, dtype=np.int64)  # Row -> audio_id, shared by clones
+        self._notes = []  # Row -> VoiceNote
+        self._rows = {}  # VoiceNote -> row
+        self._owners = {}  # VoiceNote -> task it belongs to
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._notes)
+
+    def add(self, voice_note, embedding, owner=None):
+        with self._lock:
+            if voice_note in self._rows:
+                self._matrix[self._rows[voice_note]] = embedding
+            else:
+                if len(self._notes) == len(self._matrix):
+                    self._matrix = np.concatenate((self._matrix, np.zeros_like(self._matrix)))
+                    self._audio_ids = np.concatenate((self._audio_ids, np.zeros_like(self._audio_ids)))
+                self._matrix[len(self._notes)] = embedding
+                self._audio_ids[len(self._notes)] = voice_note.audio_id
+                self._rows[voice_note] = len(self._notes)
+                self._notes.append(voice_note)
+            self._owners[voice_note] = owner
+
+    def remove(self, voice_note):
+        with self._lock:
+            row = self._rows.pop(voice_note, None)
+            if row is None:
+                return
+            self._owners.pop(voice_note, None)
+            last_note = self._notes.pop()
+            if last_note is not voice_note:
+                # Move the last row into the hole to keep the matrix dense
+                self._matrix[row] = self._matrix[len(self._notes)]
+                self._audio_ids[row] = self._audio_ids[len(self._notes)]
+                self._notes[row] = last_note
+                self._rows[last_note] = row
+
+    def query(self, voice_note, k=5):
+        # [(note, owner, similarity)] most similar first, excluding voice_note
+        # itself and clones of it (duplicated tasks share the audio)
+        with self._lock:
+            row = self._rows.get(voice_note)
+            if row is None:
+                return []
+            scores = self._matrix[:len(self._notes)] @ self._matrix[row]
+            same_audio = self._audio_ids[:len(self._notes)] == voice_note.audio_id
+            scores[same_audio] = -np.inf
+            k = min(k, len(self._notes) - int(same_audio.sum()))
+            if k <= 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(self._notes[i], self._owners[self._notes[i]], float(scores[i])) for i in top]
+
+
+VOICE_SIMILARITY_INDEX = SimilarityIndex()
+
+
+class TranscriptionBackend(ABC):
+    # Interface for local speech-to-text engines used by TranscriptionPool
+    name = "none"
+
+    @abstractmethod
+    def transcribe(self, audio_data, fs):
+        pass
+
+
+class StubTranscriptionBackend(TranscriptionBackend):
+    # Deterministic stand-in for tests: returns the given text, or describes
+    # the audio instead of recognizing speech. Never offered in the settings.
+    name = "stub"
+
+    def __init__(self, text=None):
+        self.text = text
+
+    def transcribe(self, audio_data, fs):
+        if self.text is not None:
+            return self.text
+        samples = np.asarray(audio_data, dtype=np.float32).reshape(-1)
+        minutes, seconds = divmod(int(len(samples) / fs), 60)
+        level = float(np.sqrt(np.mean(np.square(samples)))) if len(samples) else 0.0
+        return f"voice note {minutes:02d}:{seconds:02d} {'loud' if level > 0.1 else 'quiet'}"
+
+
+class WhisperTranscriptionBackend(TranscriptionBackend):
+    # Local speech-to-text through faster-whisper, an optional dependency.
+    # The model is loaded on first use, on a transcription worker.
+    name = "whisper"
+    sample_rate = 16000  # Whisper models expect 16 kHz mono
+
+    def __init__(self, model_size="base"):
+        self.model_size = model_size
+        self._model = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def available():
+        return importlib.util.find_spec("faster_whisper") is not None
+
+    def transcribe(self, audio_data, fs):
+        with self._lock:
+            if self._model is None:
+                from faster_whisper import WhisperModel
+                self._model = WhisperModel(self.model_size, device="cpu", compute_type="int8")
+        samples = np.asarray(audio_data, dtype=np.float32).reshape(-1)
+        if fs != self.sample_rate and len(samples):
+            positions = np.arange(0, len(samples), fs / self.sample_rate)
+            samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+        segments, _ = self._model.transcribe(samples)
+        return " ".join(segment.text.strip() for segment in segments)
+
+
+# Engines offered in the settings; only installed ones are listed
+TRANSCRIPTION_BACKENDS = {
+    backend.name: backend for backend in (WhisperTranscriptionBackend,) if backend.available()
+}
+
+
+def make_transcription_backend(name):
+    # Backend by name, or None for "off". The stub is accepted here for tests
+    # and debugging, but is not in TRANSCRIPTION_BACKENDS: its text would
+    # match every note in search.
+    backend = TRANSCRIPTION_BACKENDS.get(name)
+    if backend is None and name == StubTranscriptionBackend.name:
+        backend = StubTranscriptionBackend
+    return backend() if backend else None
+
+
+class TranscriptionPool:
+    # Bounded worker pool that transcribes voice notes away from the record
+    # thread and the page loop, then reports back through on_done. Without a
+    # backend, notes are not transcribed; set_backend installs one.
+    def __init__(self, backend=None, max_workers=2):
+        self.backend = backend
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="transcribe")
+
+    def set_backend(self, backend):
+        # Applies to notes recorded from now on
+        self.backend = backend
+
+    def submit(self, voice_note, audio_data, on_done):
+        # audio_data is passed in so the note's stored copy is never decoded for
+        # this; None reads the note's recording file on the worker instead
+        backend = self.backend  # Queued jobs keep the backend they were submitted with
+        if backend is None:
+            return None
+        return self._executor.submit(self._transcribe, backend, voice_note, audio_data, on_done)
+
+    def _transcribe(self, backend, voice_note, audio_data, on_done):
+        try:
+            if audio_data is None:
+                audio_data, _ = sf.read(voice_note.path, dtype='float32', always_2d=True)
+            voice_note.transcript = backend.transcribe(audio_data, voice_note.fs)
+        except Exception as e:
+            print(f"Error in transcription ({backend.name}): {e}")
+            return
+        on_done(voice_note)
+
+
+TRANSCRIPTION_POOL = TranscriptionPool()  # Off until a backend is picked in the settings
+VOICE_NOTE_WORKER = ThreadPoolExecutor(max_workers=1, thread_name_prefix="voice-note")  # Finishes takes after recording
+
+
+class UiTicker:
+    # Single loop on the page's asyncio loop that refreshes the progress label
+    # of every playing note and sends one coalesced update per frame.
+    _tickers = {}  # Page session id -> UiTicker
+
+    @classmethod
+    def for_page(cls, page):
+        ticker = cls._tickers.get(page.session_id)
+        if ticker is None:
+            ticker = cls._tickers[page.session_id] = cls(page)
+        return ticker
+
+    @classmethod
+    def forget_page(cls, page):
+        cls._tickers.pop(page.session_id, None)
+
+    def __init__(self, page, interval=1 / 30):
+        self.page = page
+        self.interval = interval
+        self._labels = {}  # VoiceNote -> (label, render)
+        self._running = False
+        self._lock = threading.Lock()  # track/untrack come from handler threads
+
+    def track(self, voice_note, label, render):
+        with self._lock:
+            self._labels[voice_note] = (label, render)
+            start = not self._running
+            self._running = True
+        if start:
+            self.page.run_task(self._run)
+
+    def untrack(self, voice_note):
+        with self._lock:
+            self._labels.pop(voice_note, None)
+
+    async def _run(self):
+        try:
+            while True:
+                with self._lock:
+                    if not self._labels:
+                        # Decided under the lock, so a concurrent track() starts a new loop
+                        self._running = False
+                        return
+                    labels = list(self._labels.items())
+                changed = []
+                for voice_note, (label, render) in labels:
+                    value = render(voice_note)
+                    if label.value != value:
+                        label.value = value
+                        changed.append(label)
+                    if not voice_note.is_playing:
+                        self.untrack(voice_note)
+                if changed:
+                    self.page.update(*changed)
+                await asyncio.sleep(self.interval)
+        except BaseException:
+            with self._lock:
+                self._running = False
+            raise
+
+
+class UpdateScheduler:
+    # Collects controls marked dirty from any thread and sends them with a
+    # single page.update on the next tick of the page's event loop. Marking
+    # the page itself sends a full page update instead.
+    _schedulers = {}  # Page session id -> UpdateScheduler
+
+    @classmethod
+    def for_page(cls, page):
+        scheduler = cls._schedulers.get(page.session_id)
+        if scheduler is None:
+            scheduler = cls._schedulers[page.session_id] = cls(page)
+        return scheduler
+
+    @classmethod
+    def forget_page(cls, page):
+        cls._schedulers.pop(page.session_id, None)
+
+    def __init__(self, page):
+        self.page = page
+        self._dirty = {}  # id(control) -> control, in the order they were marked
+        self._lock = threading.Lock()
+        self._scheduled = False
+        self.requests = 0  # Controls marked dirty
+        self.flushes = 0  # page.update calls actually sent
+
+    @property
+    def coalesced(self):
+        return self.requests - self.flushes
+
+    def mark(self, *controls):
+        with self._lock:
+            for control in controls:
+                self._dirty[id(control)] = control
+            self.requests += len(controls)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self.page.loop.call_soon_threadsafe(self.flush)
+
+    def flush(self):
+        with self._lock:
+            dirty = list(self._dirty.values())
+            self._dirty.clear()
+            self._scheduled = False
+        if any(control is self.page for control in dirty):
+            dirty = []
+        else:
+            dirty = [control for control in dirty if getattr(control, "mounted", True)]
+            if not dirty:
+                return
+        self.flushes += 1
+        self.page.update(*dirty)
+
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class SearchIndex:
+    # Inverted index from tokens to tasks, kept up to date as task text
+    # changes. Query tokens match indexed tokens by prefix via a sorted
+    # vocabulary, and a query is the intersection of the per-token postings.
+    def __init__(self):
+        self._postings = {}  # token -> set of tasks
+        self._vocabulary = []  # Sorted tokens
+        self._task_tokens = {}  # task -> set of tokens
+
+    def __len__(self):
+        return len(self._task_tokens)
+
+    def update(self, task, text):
+        tokens = set(tokenize(text))
+        old_tokens = self._task_tokens.get(task, set())
+        for token in old_tokens - tokens:
+            postings = self._postings[token]
+            postings.discard(task)
+            if not postings:
+                del self._postings[token]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+        for token in tokens - old_tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = set()
+                bisect.insort(self._vocabulary, token)
+            postings.add(task)
+        self._task_tokens[task] = tokens
+
+    def remove(self, task):
+        if task in self._task_tokens:
+            self.update(task, "")
+            del self._task_tokens[task]
+
+    def matching(self, token):
+        # Union of the postings of every indexed token starting with token
+        matches = set()
+        index = bisect.bisect_left(self._vocabulary, token)
+        while index < len(self._vocabulary) and self._vocabulary[index].startswith(token):
+            matches |= self._postings[self._vocabulary[index]]
+            index += 1
+        return matches
+
+    def task_matches(self, task, tokens):
+        task_tokens = self._task_tokens.get(task, ())
+        return all(any(task_token.startswith(token) for task_token in task_tokens) for token in tokens)
+
+    def search(self, query):
+        # Set of matching tasks, or None when the query has no tokens
+        tokens = tokenize(query)
+        if not tokens:
+            return None
+        results = None
+        for token in sorted(set(tokens), key=len, reverse=True):  # Longest, most selective first
+            matches = self.matching(token)
+            results = matches if results is None else results & matches
+            if not results:
+                break
+        return results
+
+
+def trigrams(text):
+    # Word-padded character trigrams, so "tsak" still shares most of "task"
+    grams = Counter()
+    for token in tokenize(text):
+        padded = f"  {token} "
+        for start in range(len(padded) - 2):
+            grams[padded[start:start + 3]] += 1
+    return grams
+
+
+class TrigramIndex:
+    # Typo-tolerant companion to SearchIndex. Postings map trigrams to
+    # per-task frequencies, and candidates sharing enough query trigrams are
+    # ranked with BM25 without touching tasks that share none.
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings = {}  # trigram -> {task: frequency}
+        self._task_grams = {}  # task -> Counter of trigrams
+        self._task_lengths = {}  # task -> number of trigrams
+        self._total_length = 0
+
+    def __len__(self):
+        return len(self._task_grams)
+
+    def update(self, task, text):
+        self.remove(task)
+        grams = trigrams(text)
+        for gram, frequency in grams.items():
+            self._postings.setdefault(gram, {})[task] = frequency
+        self._task_grams[task] = grams
+        self._task_lengths[task] = sum(grams.values())
+        self._total_length += self._task_lengths[task]
+
+    def remove(self, task):
+        grams = self._task_grams.pop(task, None)
+        if grams is None:
+            return
+        for gram in grams:
+            postings = self._postings[gram]
+            del postings[task]
+            if not postings:
+                del self._postings[gram]
+        self._total_length -= self._task_lengths.pop(task)
+
+    def search(self, query, limit=20, min_overlap=0.4):
+        # [(task, score)] best first; a task must share min_overlap of the query trigrams
+        grams = trigrams(query)
+        if not grams or not self._task_grams:
+            return []
+        task_count = len(self._task_grams)
+        average_length = self._total_length / task_count
+        scores = {}
+        overlaps = Counter()
+        for gram in grams:
+            postings = self._postings.get(gram)
+            if not postings:
+                continue
+            idf = math.log(1 + (task_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for task, frequency in postings.items():
+                length_norm = self.k1 * (1 - self.b + self.b * self._task_lengths[task] / average_length)
+                scores[task] = scores.get(task, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + length_norm)
+                overlaps[task] += 1
+        needed = max(1, math.ceil(min_overlap * len(grams)))
+        candidates = (task for task in scores if overlaps[task] >= needed)
+        return [(task, scores[task]) for task in heapq.nlargest(limit, candidates, key=scores.get)]
+
+
+class SearchSession:
+    # Debounced incremental search over a SearchIndex, run on the page loop.
+    # A query that extends the previous one only re-checks the previous
+    # results, and each new keystroke cancels any evaluation still running.
+    def __init__(self, page, index, on_results, delay=0.15, batch_size=512):
+        self.page = page
+        self.index = index
+        self.on_results = on_results
+        self.delay = delay
+        self.batch_size = batch_size  # Candidates checked between cancellation points
+        self.query = ""
+        self.results = None
+        self._generation = 0
+
+    def submit(self, query):
+        self._generation += 1
+        self.page.run_task(self._run, query, self._generation)
+
+    def reset(self):
+        self._generation += 1  # Cancels pending searches
+        self.query = ""
+        self.results = None
+
+    def remember(self, query, results):
+        # Results computed outside the session, e.g. after the index changed
+        self.reset()
+        self.query = query
+        self.results = results
+
+    def discard(self, task):
+        if self.results is not None:
+            self.results.discard(task)
+
+    async def _run(self, query, generation):
+        await asyncio.sleep(self.delay)
+        if generation != self._generation:
+            return
+        tokens = tokenize(query)
+        if not tokens:
+            results = None
+        elif self.results is not None and query.lower().startswith(self.query.lower()):
+            # Every match of the longer query also matched the previous one
+            results = set()
+            for position, task in enumerate(list(self.results)):
+                if position % self.batch_size == 0:
+                    await asyncio.sleep(0)
+                    if generation != self._generation:
+                        return
+                if self.index.task_matches(task, tokens):
+                    results.add(task)
+        else:
+            results = self.index.search(query)
+        if generation != self._generation:
+            return
+        self.query = query
+        self.results = results
+        self.on_results(results)
+
+
+PRIORITIES = ("No priority", "Highest", "High", "Medium", "Low", "Lowest")
+PRIORITY_COLORS = {
+    "No priority": ft.colors.BLACK,
+    "Highest": ft.colors.RED,
+    "High": ft.colors.PURPLE,
+    "Medium": ft.colors.ORANGE,
+    "Low": ft.colors.BLUE,
+    "Lowest": ft.colors.GREEN,
+}
+PRIORITY_RANK = {"Highest": 0, "High": 1, "Medium": 2, "Low": 3, "Lowest": 4, "No priority": 5}
+
+# Sort orders maintained by TaskStore; the task id breaks ties and makes keys unique
+SORT_KEYS = {
+    "created_at": lambda record: (record.created_at, record.task_id),
+    "priority": lambda record: (PRIORITY_RANK.get(record.priority, len(PRIORITY_RANK)), record.task_id),
+    "due_date": lambda record: (record.due_date or date.max, record.task_id),
+}
+
+
+class TaskRecord:
+    # Plain task state, kept apart from the flet controls that display it so
+    # filtering, counting and charts can run without touching the UI.
+    __slots__ = ("task_id", "name", "priority", "due_date", "descriptions",
+                 "voice_notes", "locked", "completed", "created_at", "store")
+    _ids = itertools.count(1)
+
+    def __init__(self, name, priority="No priority", due_date=None, completed=False, created_at=None):
+        self.task_id = next(TaskRecord._ids)
+        self.name = name
+        self.priority = priority
+        self.due_date = due_date
+        self.descriptions = []
+        self.voice_notes = []
+        self.locked = False
+        self.completed = completed
+        self.created_at = created_at or datetime.now()
+        self.store = None  # Set while the record belongs to a TaskStore
+
+    def set_field(self, name, value):
+        # Goes through the store so its sort orders follow the change
+        if self.store is not None:
+            self.store.reindex(self, name, value)
+        else:
+            setattr(self, name, value)
+
+
+class TaskStore:
+    # Ordered collection of task records with the completed count, priority
+    # histogram and due date counts kept current, so counting never walks the
+    # list. Every order in SORT_KEYS is kept as a sorted key list, updated by
+    # bisection as records change.
+    def __init__(self):
+        self._records = {}  # task_id -> TaskRecord, in insertion order
+        self._orders = {name: [] for name in SORT_KEYS}  # name -> sorted keys
+        self.completed_count = 0
+        self.status_ids = {"active": set(), "completed": set()}  # Filter tab -> task_ids
+        self.priority_histogram = Counter()
+        self.due_date_counts = Counter()
+        self._due_days = []  # Sorted distinct due dates
+        self.on_reorder = None  # Called with (record, order name) after a record moves in an order
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        return iter(self._records.values())
+
+    def __contains__(self, record):
+        return record.task_id in self._records
+
+    @property
+    def active_count(self):
+        return len(self._records) - self.completed_count
+
+    def add(self, record):
+        if record.task_id in self._records:
+            return
+        self._records[record.task_id] = record
+        record.store = self
+        self.completed_count += record.completed
+        self.status_ids[self.status(record)].add(record.task_id)
+        self._count(record, 1)
+        for name, keys in self._orders.items():
+            bisect.insort(keys, SORT_KEYS[name](record))
+
+    def remove(self, record):
+        if self._records.pop(record.task_id, None) is not None:
+            record.store = None
+            self.completed_count -= record.completed
+            self.status_ids[self.status(record)].discard(record.task_id)
+            self._count(record, -1)
+            for name, keys in self._orders.items():
+                self._discard_key(keys, SORT_KEYS[name](record))
+
+    def reindex(self, record, name, value):
+        # Each order is named after the field it sorts by
+        keys = self._orders.get(name)
+        if keys is None:
+            setattr(record, name, value)
+            return
+        self._discard_key(keys, SORT_KEYS[name](record))
+        self._count(record, -1)
+        setattr(record, name, value)
+        self._count(record, 1)
+        bisect.insort(keys, SORT_KEYS[name](record))
+        if self.on_reorder:
+            self.on_reorder(record, name)
+
+    def position(self, name, record):
+        return bisect.bisect_left(self._orders[name], SORT_KEYS[name](record))
+
+    def _count(self, record, step):
+        self.priority_histogram[record.priority] += step
+        if record.due_date:
+            count = self.due_date_counts[record.due_date] + step
+            if count:
+                if count == step:
+                    bisect.insort(self._due_days, record.due_date)
+                self.due_date_counts[record.due_date] = count
+            else:
+                del self.due_date_counts[record.due_date]
+                self._discard_key(self._due_days, record.due_date)
+
+    def _discard_key(self, keys, key):
+        i = bisect.bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            del keys[i]
+
+    def ordered(self, name):
+        # Records in the given sort order, without sorting
+        return [self._records[key[-1]] for key in self._orders[name]]
+
+    def set_completed(self, record, completed):
+        completed = bool(completed)
+        if record.completed != completed:
+            if record.task_id in self._records:
+                self.status_ids[self.status(record)].discard(record.task_id)
+                self.completed_count += 1 if completed else -1
+            record.completed = completed
+            if record.task_id in self._records:
+                self.status_ids[self.status(record)].add(record.task_id)
+
+    def status(self, record):
+        return "completed" if record.completed else "active"
+
+    def has_status(self, record, status):
+        # Matches a filter tab; "all" matches every record
+        ids = self.status_ids.get(status)
+        return ids is None or record.task_id in ids
+
+    def priority_counts(self):
+        return self.priority_histogram
+
+    def due_date_series(self):
+        # [(day, tasks due up to and including day)], O(distinct days)
+        series = []
+        total = 0
+        for day in self._due_days:
+            total += self.due_date_counts[day]
+            series.append((day, total))
+        return series
+
+    def aggregates(self):
+        # Hashable summary of everything the dashboard charts show
+        return (
+            self.completed_count,
+            self.active_count,
+            tuple(self.priority_histogram[priority] for priority in PRIORITIES),
+            tuple(self.due_date_series()),
+        )
+
+
+class TaskEventLog:
+    # Append-only log of task lifecycle events. Daily and weekly rollups and
+    # a weekday x hour completion heatmap are updated as events arrive, so
+    # history charts are answered per bucket instead of replaying the log.
+    # Buckets appear in time order because events are appended in time order.
+    def __init__(self):
+        self.events = []  # (timestamp, kind, task_id)
+        self.daily = {}  # date -> Counter of event kinds, plus the "open" delta
+        self.weekly = {}  # Monday of the week -> Counter, as daily
+        self.heatmap = [[0] * 24 for _ in range(7)]  # Completions by weekday and hour
+
+    def __len__(self):
+        return len(self.events)
+
+    def record(self, kind, task_id, open_delta=0, timestamp=None):
+        # open_delta is the change in the number of open tasks
+        timestamp = timestamp or datetime.now()
+        self.events.append((timestamp, kind, task_id))
+        day = timestamp.date()
+        for rollup, bucket in ((self.daily, day), (self.weekly, day - timedelta(days=day.weekday()))):
+            counts = rollup.get(bucket)
+            if counts is None:
+                counts = rollup[bucket] = Counter()
+            counts[kind] += 1
+            counts["open"] += open_delta
+        if kind == "completed":
+            self.heatmap[timestamp.weekday()][timestamp.hour] += 1
+
+    def rollup(self, period):
+        return self.weekly if period == "weekly" else self.daily
+
+    def current_bucket(self, period="daily"):
+        # (bucket holding today, bucket length)
+        today = date.today()
+        if period == "weekly":
+            return today - timedelta(days=today.weekday()), timedelta(weeks=1)
+        return today, timedelta(days=1)
+
+    def throughput(self, period="daily", last=None):
+        # [(bucket, tasks completed in it)]; with last, the last calendar
+        # buckets up to and including today, quiet ones counted as 0
+        rollup = self.rollup(period)
+        if not last:
+            return [(bucket, counts["completed"]) for bucket, counts in rollup.items()]
+        current, step = self.current_bucket(period)
+        buckets = [current - step * i for i in range(last - 1, -1, -1)]
+        return [(bucket, rollup.get(bucket, Counter())["completed"]) for bucket in buckets]
+
+    def burn_down(self, period="daily"):
+        # [(bucket, tasks still open at its end)] for every calendar bucket
+        # from the first event up to and including today; quiet ones carry
+        # the previous count
+        rollup = self.rollup(period)
+        if not rollup:
+            return []
+        current, step = self.current_bucket(period)
+        bucket = next(iter(rollup))
+        series = []
+        remaining = 0
+        while bucket <= current:
+            remaining += rollup.get(bucket, Counter())["open"]
+            series.append((bucket, remaining))
+            bucket += step
+        return series
+
+
+def figure_png(fig):
+    buf = BytesIO()
+    fig.savefig(buf, format="png")
+    return base64.b64encode(buf.getvalue()).decode()
+
+
+def render_dashboard_images(aggregates):
+    # Static PNG versions of the dashboard charts. Uses Figure directly
+    # rather than pyplot, which is not thread-safe.
+    completed, active, priority_counts, due_series = aggregates
+    images = {}
+
+    fig = Figure()
+    ax = fig.subplots()
+    sizes = [(status, size) for status, size in (("Completed", completed), ("Active", active)) if size > 0]
+    if sizes:
+        ax.pie([size for status, size in sizes], labels=[status for status, size in sizes], autopct='%1.1f%%', startangle=90)
+    else:
+        ax.text(0.5, 0.5, 'No tasks', horizontalalignment='center', verticalalignment='center')
+        ax.axis('off')
+    ax.axis('equal')
+    images["status"] = figure_png(fig)
+
+    fig = Figure()
+    ax = fig.subplots()
+    ax.bar(PRIORITIES, priority_counts)
+    ax.set_ylabel('Number of Tasks')
+    ax.set_title('Tasks by Priority')
+    images["priority"] = figure_png(fig)
+
+    fig = Figure()
+    ax = fig.subplots()
+    ax.plot([day for day, total in due_series], [total for day, total in due_series])
+    ax.set_xlabel('Due Date')
+    ax.set_ylabel('Cumulative Number of Tasks')
+    ax.set_title('Task Accumulation Over Time')
+    images["due"] = figure_png(fig)
+    return images
+
+
+class DashboardRenderer:
+    # Renders dashboard images on a worker thread, memoized by the aggregates
+    # they were drawn from. Only the most recently requested aggregates are
+    # rendered; requests superseded while queued are dropped.
+    def __init__(self, capacity=8):
+        self.capacity = capacity
+        self.latest = None  # Most recently rendered images
+        self._cache = OrderedDict()  # aggregates -> images, least recent first
+        self._wanted = None
+        self._pending = set()  # Aggregates queued or being rendered
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dashboard")
+
+    def request(self, aggregates, on_done):
+        # Calls on_done(images) now if cached, otherwise from the worker
+        with self._lock:
+            images = self._cache.get(aggregates)
+            if images is not None:
+                self._cache.move_to_end(aggregates)
+                self.latest = images
+            else:
+                self._wanted = aggregates
+                queued = aggregates in self._pending
+                self._pending.add(aggregates)
+        if images is not None:
+            on_done(images)
+        elif not queued:
+            self._executor.submit(self._render, aggregates, on_done)
+
+    def _render(self, aggregates, on_done):
+        with self._lock:
+            if aggregates != self._wanted:
+                self._pending.discard(aggregates)
+                return  # Superseded by a newer request
+        try:
+            images = render_dashboard_images(aggregates)
+        except Exception as e:
+            print(f"Error rendering dashboard: {e}")
+            return
+        finally:
+            with self._lock:
+                self._pending.discard(aggregates)
+        with self._lock:
+            self._cache[aggregates] = images
+            if len(self._cache) > self.capacity:
+                self._cache.popitem(last=False)
+            self.latest = images
+        on_done(images)
+
+
+DASHBOARD_RENDERER = DashboardRenderer()
+
+
+def sync_line_points(data, series):
+    # Points of an ft.LineChartData kept in step with [(x, y)] in place.
+    # Existing points are reused by x, so flet only sends changed values and
+    # points for x values that appeared.
+    points = data.data_points or []
+    if [point.x for point in points] != [x for x, y in series]:
+        by_x = {point.x: point for point in points}
+        points = [by_x.get(x) or ft.LineChartDataPoint(x, y) for x, y in series]
+        data.data_points = points
+    for point, (x, y) in zip(points, series):
+        point.y = y
+
+
+def sync_day_labels(axis, days, fmt="%Y-%m-%d"):
+    # Date labels of an ordinal-valued axis, replaced only when the days change
+    values = [day.toordinal() for day in days]
+    if [label.value for label in axis.labels or []] != values:
+        axis.labels = [ft.ChartAxisLabel(value=value, label=ft.Text(day.strftime(fmt), size=10)) for value, day in zip(values, days)]
+
+
+class FenwickTree:
+    # Prefix sums over a list of non-negative numbers with O(log n) point
+    # updates, prefix queries and searches.
+    def __init__(self, values=()):
+        self.values = list(values)
+        self._build()
+
+    def _build(self):
+        self._tree = [0, *self.values]
+        for i in range(1, len(self._tree)):
+            parent = i + (i & -i)
+            if parent < len(self._tree):
+                self._tree[parent] += self._tree[i]
+
+    def __len__(self):
+        return len(self.values)
+
+    def remove(self, index):
+        # The values after index shift down by one, so this is O(n)
+        del self.values[index]
+        self._build()
+
+    def move(self, old, new):
+        # Moves one value to another index; the values between shift by one, so this is O(n)
+        self.values.insert(new, self.values.pop(old))
+        self._build()
+
+    def set(self, index, value):
+        delta = value - self.values[index]
+        self.values[index] = value
+        index += 1
+        while index < len(self._tree):
+            self._tree[index] += delta
+            index += index & -index
+
+    def prefix(self, end):
+        # Sum of values[:end]
+        total = 0
+        while end > 0:
+            total += self._tree[end]
+            end -= end & -end
+        return total
+
+    def total(self):
+        return self.prefix(len(self.values))
+
+    def search(self, target):
+        # Largest end with prefix(end) <= target
+        end = 0
+        step = 1 << len(self.values).bit_length()
+        while step:
+            if end + step < len(self._tree) and self._tree[end + step] <= target:
+                end += step
+                target -= self._tree[end]
+            step >>= 1
+        return end
+
+
+class VirtualTaskList:
+    # Column-compatible task container backed by an ft.ListView that only
+    # materializes the rows in or near the viewport. Rows outside the window
+    # are stood in for by two spacers sized from per-task height estimates,
+    # so expanded tasks take their real share of the scroll range. Row
+    # extents and visibility are kept in Fenwick trees over the positions in
+    # controls, so one task changing is O(log n) instead of a relayout.
+    def __init__(self, height=500, item_extent=96, overscan=10, detail_extent=260, note_extent=110):
+        self.controls = []  # Every task in display order, materialized or not
+        self.item_extent = item_extent  # Collapsed row
+        self.detail_extent = detail_extent  # Added by an expanded row's detail view
+        self.note_extent = note_extent  # Added per voice note of an expanded row
+        self.overscan = overscan
+        self._positions = {}  # Task -> index in controls
+        self._extents = FenwickTree()  # Per position, the row's extent or 0 while hidden
+        self._shown = FenwickTree()  # Per position, 1 while the task passes the filters
+        self._window = set()
+        self._first = 0  # Rank among visible rows of the top row at the last render
+        self._pixels = 0
+        self._viewport = height
+        self._top_spacer = ft.Container(height=0)
+        self._bottom_spacer = ft.Container(height=0)
+        self.view = ft.ListView(height=height, on_scroll=self.scrolled, on_scroll_interval=50)
+
+    def is_materialized(self, task):
+        return task in self._window
+
+    def extent(self, task):
+        if not task.visible:
+            return 0
+        if not task.expanded:
+            return self.item_extent
+        return self.item_extent + self.detail_extent + self.note_extent * len(task.voice_notes)
+
+    def refresh(self, update=True):
+        # Full rebuild, for when controls was reordered or replaced
+        self._positions = {task: position for position, task in enumerate(self.controls)}
+        self._extents = FenwickTree(self.extent(task) for task in self.controls)
+        self._shown = FenwickTree(int(bool(task.visible)) for task in self.controls)
+        self._render(update)
+
+    def update(self):
+        self.refresh()
+
+    def task_changed(self, task, update=True):
+        return self.tasks_changed([task], update)
+
+    def tasks_changed(self, tasks, update=True):
+        # The visibility or extent of some tasks may have changed. Returns
+        # whether the rows shifted; if not, nothing is re-rendered. Past the
+        # point where O(log n) updates per task cost more than a rebuild,
+        # the trees are rebuilt instead.
+        if len(tasks) * len(self.controls).bit_length() >= len(self.controls):
+            self.refresh(update)
+            return True
+        shifted = False
+        for task in tasks:
+            position = self._positions.get(task)
+            if position is None:
+                self.refresh(update)
+                return True
+            extent, shown = self.extent(task), int(bool(task.visible))
+            if self._extents.values[position] != extent or self._shown.values[position] != shown:
+                self._extents.set(position, extent)
+                self._shown.set(position, shown)
+                shifted = True
+        if shifted:
+            self._render(update)
+        return shifted
+
+    def task_resized(self, task):
+        # Expanding or collapsing a row shifts every row below it
+        self.task_changed(task)
+
+    def task_removed(self, task, update=True):
+        # The task was removed from controls; the positions after it shift down
+        position = self._positions.pop(task, None)
+        if position is None:
+            return
+        self._extents.remove(position)
+        self._shown.remove(position)
+        for index in range(position, len(self.controls)):
+            self._positions[self.controls[index]] = index
+        self._render(update)
+
+    def task_moved(self, task, update=True):
+        # The task was removed and reinserted elsewhere in controls. Only the
+        # positions between its old and new index shift; no extent is recomputed
+        old = self._positions.get(task)
+        if old is None:
+            self.refresh(update)
+            return
+        new = self.controls.index(task)
+        if old == new:
+            self.task_changed(task, update)
+            return
+        self._extents.move(old, new)
+        self._shown.move(old, new)
+        for position in range(min(old, new), max(old, new) + 1):
+            self._positions[self.controls[position]] = position
+        if not self.task_changed(task, update):
+            self._render(update)
+
+    def scrolled(self, e):
+        # Re-rendered only after scrolling a few rows, since the overscan covers the rest
+        self._viewport = e.viewport_dimension or self._viewport
+        self._pixels = e.pixels
+        if abs(self._rank_at(e.pixels) - self._first) >= max(1, self.overscan // 2):
+            self._render(True)
+
+    def _rank_at(self, pixels):
+        # Number of visible rows that end at or above pixels
+        return self._shown.prefix(self._extents.search(pixels))
+
+    def _render(self, update):
+        # The window is always derived from the scroll offset, so rows above
+        # it changing size can never leave the top spacer past the viewport
+        count = self._shown.total()
+        self._first = self._rank_at(self._pixels)
+        first = max(0, min(self._first, count - 1) - self.overscan)
+        last = min(count, self._rank_at(self._pixels + self._viewport) + 1 + self.overscan)
+        window = [self.controls[self._shown.search(rank)] for rank in range(first, last)]
+        if window:
+            self._top_spacer.height = self._extents.prefix(self._positions[window[0]])
+            self._bottom_spacer.height = self._extents.total() - self._extents.prefix(self._positions[window[-1]] + 1)
+        else:
+            self._top_spacer.height = 0
+            self._bottom_spacer.height = 0
+        self._window = set(window)
+        self.view.controls = [self._top_spacer, *window, self._bottom_spacer]
+        if update and self.view.page:
+            self.view.update()
+
 
 class VerticalProgressBar(ft.UserControl):
     def __init__(self, value, height=100, color="green", bgcolor="#EEEEEE"):
@@ -93,67 +1800,40 @@ class VerticalProgressBar(ft.UserControl):
         )
 
 class VoiceTask(ft.UserControl):
-    def __init__(self, page, task_name, task_delete, task_status_change, parent_container, handle_dismissal):
+    def __init__(self, page, task_name, task_delete, task_status_change, parent_container, handle_dismissal, task_text_change=None, task_add=None, record=None, task_select=None):
         super().__init__()
-        self.locked = False
+        self.record = record or TaskRecord(task_name)  # Task state lives here, the control only displays it
         self.page = page
-        self.full_task_name = task_name
+        self.app_page = page  # flet sets page to None while the row is unmounted; this one stays for background work
         self.task_name = self.format_task_name(task_name)
         self.task_delete = task_delete
         self.task_status_change = task_status_change
+        self.task_text_change = task_text_change  # Called when name or descriptions change
+        self.task_add = task_add  # Registers a new task (e.g. a duplicate) with the app
+        self.task_select = task_select  # Toggles the task in the app's multi-selection
         self.parent_container = parent_container
         self.handle_dismissal = handle_dismissal  # Store the handle_dismissal function
         self.description_field = None
         
         self.play_pause_buttons = {} 
+        self.voice_note_rows = {}  # VoiceNote -> row control
+        self.time_displays = {}  # VoiceNote -> progress label
+        self.waveform_images = {}  # VoiceNote -> waveform image
+        self.waveform_views = {}  # VoiceNote -> visible (start, end) frames
+        self.mounted = False  # Rows scrolled out of a virtualized list are unmounted
+        self.deleted = False  # Set once the task is deleted; late recordings are discarded
         # self.init_ui_elements()
         # Initialize buttons
-        self.priority_colors = {
-            "No priority": ft.colors.BLACK,
-            "Highest": ft.colors.RED,
-            "High": ft.colors.PURPLE,
-            "Medium": ft.colors.ORANGE,
-            "Low": ft.colors.BLUE,
-            "Lowest": ft.colors.GREEN,
-        }
-        self.live_waveform = ft.Image(visible=False)
+        self.priority_colors = PRIORITY_COLORS
+        self.live_waveform_view = LiveWaveform(width=200, height=50)
+        self.live_waveform = ft.Image(src_base64=self.live_waveform_view.render(), width=200, height=50)
         self.live_waveform_container = ft.Container(
             content=self.live_waveform,
             visible=False,
             width=200,
             height=50,
         )
-        self.current_priority = "No priority"
-        self.search_descriptions = ft.TextField(
-            # height=30,
-            hint_text="find descriptions...",
-            expand=True,
-            on_change=self.filter_descriptions,
-            prefix_icon=ft.icons.SEARCH,
-            bgcolor=ft.colors.BLUE_50,
-            border_radius=ft.border_radius.all(25),
-            border=ft.border.all(1, ft.colors.GREY_400),
-            text_style=ft.TextStyle(color=ft.colors.WHITE),
-            hint_style=ft.TextStyle(color=ft.colors.GREY_400),
-            color=ft.colors.BLACK,
-            autofocus=True,
-            autocorrect=True,
-            enable_suggestions=True,
-            capitalization=ft.TextCapitalization.SENTENCES,
-            cursor_width=2,
-            cursor_color=ft.colors.BLUE_600,
-            focused_border_color=ft.colors.BLUE_400,
-            focused_bgcolor=ft.colors.BLUE_100,
-            suffix_icon=ft.icons.CLEAR,
-            tooltip="Enter search terms",
-            keyboard_type=ft.KeyboardType.TEXT,
-            selection_color=ft.colors.BLUE_200,
-            # max_length=50,
-            # counter_text="0/50",
-            # helper_text="Search in task descriptions",
-            error_style=ft.TextStyle(color=ft.colors.RED_400),
-            dense=True
-        )
+        self.live_refresh_interval = 0.05  # Seconds between live view updates while recording
                 
         self.play_pause_button = ft.IconButton(
             icon=ft.icons.PLAY_ARROW,
@@ -183,24 +1863,22 @@ class VoiceTask(ft.UserControl):
             width=None,  # Set to None to allow it to stretch
             height=5,  # Fixed height
         )
-        
-        # self.volume_bar = ft.ProgressBar(
-        #     width=100, 
-        #     color="green", 
-        #     visible=False
-        #     )
         self.record_button = ft.IconButton(
             icon=ft.icons.MIC,
             tooltip="Record Voice Note",
             on_click=self.toggle_recording,
             icon_color=ft.colors.RED,
-            icon_size=20,
+            icon_size=22,
         )
-        self.play_pause_button = ft.IconButton(
-            icon=ft.icons.PLAY_ARROW,
-            tooltip="Play Voice Note",
-            on_click=self.toggle_playback,
-            visible=False,
+        self.description_button = ft.IconButton(
+            icon=ft.icons.DESCRIPTION_OUTLINED,
+            tooltip="Add Description",
+            on_click=self.add_description_clicked,
+        )
+        self.image_button = ft.IconButton(
+            icon=ft.icons.IMAGE,
+            tooltip="Add Image or Background Color",
+            on_click=self.show_image_dialog,
         )
         
         #////////////////////////////////////////////////////////////////////////
@@ -211,50 +1889,10 @@ class VoiceTask(ft.UserControl):
             on_change=self.status_changed
         )
         self.display_task.label_style = ft.TextStyle(weight=ft.FontWeight.BOLD, size=14, color=ft.colors.BLACK)
-        
-        self.image_button = ft.IconButton(
-            icon=ft.icons.IMAGE,
-            tooltip="Add Image or Background Color",
-            on_click=self.show_image_dialog,
-        )
-
-        self.priority_dropdown = ft.PopupMenuButton(
-            icon=ft.icons.FLAG,
-            tooltip="Set Priority",
-            items=[
-                ft.PopupMenuItem(text=priority, on_click=self.set_priority)
-                for priority in self.priority_colors.keys()
-            ]
-        )
         self.edit_name = ft.TextField(expand=1)
-        self.waveform = ft.Image(visible=False, height=50)
+        self.waveform = ft.Image(visible=False, height=40)
         self.description_preview = ft.Text("", visible=False)
 
-        # Initialize buttons
-        self.record_button = ft.IconButton(
-            icon=ft.icons.MIC,
-            tooltip="Record Voice Note",
-            on_click=self.toggle_recording,
-            icon_color=ft.colors.RED,
-            icon_size=22,
-        )
-        self.play_pause_button = ft.IconButton(
-            icon=ft.icons.PLAY_ARROW,
-            tooltip="Play Voice Note",
-            on_click=self.toggle_playback,
-            visible=False,
-        )
-        self.description_button = ft.IconButton(
-            icon=ft.icons.DESCRIPTION_OUTLINED,
-            tooltip="Add Description",
-            on_click=self.add_description_clicked,
-        )
-        self.expand_button = ft.IconButton(
-            icon=ft.icons.EXPAND_MORE,
-            on_click=self.toggle_expand
-        )
-
-        self.voice_notes = []
         self.voice_notes_container = ft.Column()
         
         #////////////////////////////////////////////////////////////////////////
@@ -268,7 +1906,6 @@ class VoiceTask(ft.UserControl):
         self.expanded = False
         self.description = ""
         self.formatting = []
-        self.due_date = None
         self.due_date_picker = None
         self.audio_data = None
         self.is_recording = False
@@ -276,6 +1913,15 @@ class VoiceTask(ft.UserControl):
         self.input_device = None
         self.record_thread = None
         self.record_generator = None
+        self.record_buffer = None
+        self.record_peaks = None  # PeakBuilder fed by the record thread
+        self.record_embedding = None  # EmbeddingBuilder fed by the record thread
+        self.record_to_disk = False  # Stream takes to a file instead of keeping them in RAM
+        self.recordings_dir = "recordings"
+        self.storage_codec = "float32"
+        self.record_file = None
+        self.record_path = None
+        self.record_frames = 0
         self.is_playing = False
         self.audio_playback = None
         self.playback_position = 0
@@ -291,82 +1937,19 @@ class VoiceTask(ft.UserControl):
         self.secret_question_field = None
         self.secret_answer_field = None
 
-        self.descriptions = []  # List to store multiple descriptions
         self.descriptions_container = ft.Column()  # Container to display descriptions
-                
-        self.detail_tab = self.build_detail_view()
-        self.mind_map_tab = self.build_mind_map_view()
-        self.description_tab = self.build_description_view()
-        
-        self.tabs = ft.Tabs(
-            selected_index=0,
-            animation_duration=300,
-            tabs=[
-                ft.Tab(text="Details", content=self.detail_tab),
-                ft.Tab(text="Mind Map", content=self.mind_map_tab),
-                ft.Tab(text="Description", content=self.description_tab),
-            ],
-            expand=1
-        )
-        self.expandable_view = ft.Container(
-            content=self.tabs,
-            visible=False
-        )
-        
-        self.display_task = ft.Checkbox(
-            value=False,
-            label=self.task_name,
-            on_change=self.status_changed
-        )
-        self.display_task.label_style = ft.TextStyle(weight=ft.FontWeight.BOLD)  # Make task name bold
-        self.display_task.label_style = ft.TextStyle(size=14)  # Make task name bold
-        self.display_task.label_style = ft.TextStyle(color=ft.colors.BLACK)  # Make task name bold
-        
-        self.image_button = ft.IconButton(
-            icon=ft.icons.IMAGE,
-            tooltip="Add Image or Background Color",
-            on_click=self.show_image_dialog,
-        )
 
-        self.priority_dropdown = ft.PopupMenuButton(
-            icon=ft.icons.FLAG,
-            tooltip="Set Priority",
-            items=[
-                ft.PopupMenuItem(text=priority, on_click=self.set_priority)
-                for priority in self.priority_colors.keys()
-            ]
-        )
-        self.edit_name = ft.TextField(expand=1)
-        self.waveform = ft.Image(visible=False, height=40)
-        self.description_preview = ft.Text("", visible=False)
-
-        self.play_pause_button = ft.IconButton(
-            icon=ft.icons.PLAY_ARROW,
-            tooltip="Play Voice Note",
-            on_click=self.toggle_playback,
-            visible=False,
-        )
-        self.description_button = ft.IconButton(
-            icon=ft.icons.DESCRIPTION_OUTLINED,
-            tooltip="Add Description",
-            on_click=self.add_description_clicked,
-        )
-
-        self.voice_notes = []
-        self.voice_notes_container = ft.Column()
-
-        # Build views
+        # Build views. The detail view is built on first expand, most tasks never are
         self.display_view = self.build_display_view()
         self.edit_view = self.build_edit_view()
-        self.detail_view = self.build_detail_view()
-        self.detail_view.visible = False
+        self.detail_view = None
+        self.search_descriptions = None
 
         # Create drop container
         self.drop_container = ft.Container(
             content=ft.Column([
                 self.display_view,
                 self.edit_view,
-                self.detail_view
             ]),
             padding=3,  # Increased padding for better spacing
             border=ft.border.all(2, ft.colors.BLUE_400),  # Thicker border with a nice blue color
@@ -390,63 +1973,57 @@ class VoiceTask(ft.UserControl):
 
     def build(self):
         return self.drop_container
-    
-    def generate_live_waveform(self, audio_chunk):
-        plt.figure(figsize=(4, 1), facecolor='none', edgecolor='none')
-        plt.plot(audio_chunk, color='#FFA500')  # Orange color
-        plt.axis('off')
-        plt.tight_layout(pad=0)
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', dpi=100, transparent=True)
-        buf.seek(0)
-        plt.close()
-        return base64.b64encode(buf.getvalue()).decode('utf-8')
-    
-    def matches_search(self, search_term):
-        if search_term.lower() in self.full_task_name.lower():
-            return True
-        for description in self.descriptions:
-            if search_term.lower() in description.lower():
-                return True
-        return False
+
+    # Task state is read from and written to the bound record
+    @property
+    def full_task_name(self):
+        return self.record.name
+
+    @full_task_name.setter
+    def full_task_name(self, value):
+        self.record.name = value
+
+    @property
+    def current_priority(self):
+        return self.record.priority
+
+    @current_priority.setter
+    def current_priority(self, value):
+        self.record.set_field("priority", value)
+
+    @property
+    def due_date(self):
+        return self.record.due_date
+
+    @due_date.setter
+    def due_date(self, value):
+        self.record.set_field("due_date", value)
+
+    @property
+    def locked(self):
+        return self.record.locked
+
+    @locked.setter
+    def locked(self, value):
+        self.record.locked = value
+
+    @property
+    def descriptions(self):
+        return self.record.descriptions
+
+    @property
+    def voice_notes(self):
+        return self.record.voice_notes
+
+    @property
+    def completed(self):
+        return self.record.completed
     
     def format_task_name(self, name):
         if len(name) > 18:
             return name[:17] + "…"  # Use ellipsis character
         return name.ljust(18)  # Pad with spaces if shorter than 18 characters
 
-    def build_mind_map_view(self):
-        # Placeholder for mind map creation area
-        return ft.Container(
-            content=ft.Column([
-                ft.Text("Mind Map Creation Area", size=20, weight=ft.FontWeight.BOLD),
-                ft.ElevatedButton("Mind Map", on_click=self.create_mind_map),
-                # Add more controls for mind map creation here
-            ]),
-            padding=5,
-            border_radius=ft.border_radius.all(5),
-        )
-
-    def build_description_view(self):
-        self.description_field = ft.TextField(
-            multiline=True,
-            min_lines=3,
-            max_lines=90,
-            value="",
-            label="Task Description",
-            on_change=self.update_description
-        )
-        return ft.Container(
-            content=ft.Column([
-                self.description_field,
-                ft.ElevatedButton("Save Description", on_click=self.save_description_and_close),
-                self.descriptions_container  # This should be here, not added to the page
-            ]),
-            padding=5,
-            border_radius=ft.border_radius.all(5),
-        )
-    
-    
     def build_display_view(self):
         self.more_options_menu = self.create_more_options_menu()
         self.lock_button = ft.IconButton(
@@ -459,6 +2036,12 @@ class VoiceTask(ft.UserControl):
             tooltip="Rename",
             on_click=self.edit_clicked
         )
+        self.select_button = ft.IconButton(
+            icon=ft.icons.CHECK_BOX_OUTLINE_BLANK,
+            tooltip="Select",
+            on_click=self.select_clicked,
+            visible=self.task_select is not None,
+        )
         # self.fingerprint_button = ft.IconButton(
         #     icon=ft.icons.FINGERPRINT,
         #     tooltip="Biometric Lock",
@@ -510,6 +2093,7 @@ class VoiceTask(ft.UserControl):
                         ),
                     ]),
                     ft.Row([
+                        self.select_button,
                         self.lock_button,
                         self.edit_button,
                         # self.fingerprint_button,
@@ -535,6 +2119,7 @@ class VoiceTask(ft.UserControl):
             alignment=ft.alignment.center,  # Center the volume bar
             # visible=False,  # Initially invisible
         ),
+                self.live_waveform_container,
                 
                 # # self.fingerprint_button,
                 # self.share_button,
@@ -574,29 +2159,11 @@ class VoiceTask(ft.UserControl):
     
     def edit_description(self, index):
         if 0 <= index < len(self.descriptions):
-            self.description_field.value = self.descriptions[index]
-            self.description_field.data = index  # Store the index being edited
             self.show_description_dialog(existing_description=self.descriptions[index], edit_index=index)
         else:
             print(f"Invalid index: {index}")
         self.page.update()
     
-    def delete_description(self, index):
-        if 0 <= index < len(self.descriptions):
-            self.descriptions.pop(index)
-            self.update_descriptions_ui()
-        else:
-            print(f"Invalid index: {index}")
-        
-    def save_clicked(self, e):
-        new_name = self.edit_name.value
-        if new_name and new_name != self.full_task_name:
-            self.full_task_name = new_name
-            self.task_name = self.format_task_name(new_name)
-            self.display_task.label = self.task_name
-        self.display_view.visible = True
-        self.edit_view.visible = False
-        self.update()
     #-------------------------------------------------------
     def xxshow_lock_dialog(self):
         self.qr_code_image = ft.Image(width=200, height=200)
@@ -912,8 +2479,17 @@ class VoiceTask(ft.UserControl):
         if not self.locked:
             self.expanded = not self.expanded
             self.expand_button.current.icon = ft.icons.EXPAND_LESS if self.expanded else ft.icons.EXPAND_MORE
-            self.detail_view.visible = self.expanded
+            self.ensure_detail_view().visible = self.expanded
             self.update()
+            if isinstance(self.parent_container, VirtualTaskList):
+                self.parent_container.task_resized(self)
+
+    def ensure_detail_view(self):
+        # Built on first expand and kept afterwards
+        if self.detail_view is None:
+            self.detail_view = self.build_detail_view()
+            self.drop_container.content.controls.append(self.detail_view)
+        return self.detail_view
             
     def lock_task(self, e):
         self.locked = not self.locked
@@ -1058,17 +2634,30 @@ class VoiceTask(ft.UserControl):
             self.task_delete,
             self.task_status_change,
             self.parent_container,
-            self.handle_dismissal  # Add this argument
+            self.handle_dismissal,  # Add this argument
+            self.task_text_change,
+            self.task_add,
+            task_select=self.task_select,
         )
         # Copy relevant attributes from self to new_task
         new_task.description = self.description
         new_task.due_date = self.due_date
         new_task.current_priority = self.current_priority
+        for voice_note in self.voice_notes:
+            # Clones share the audio, so their waveforms come from WAVEFORM_CACHE
+            voice_note_copy = voice_note.clone()
+            new_task.voice_notes.append(voice_note_copy)
+            if voice_note_copy.embedding is not None:
+                VOICE_SIMILARITY_INDEX.add(voice_note_copy, voice_note_copy.embedding, owner=new_task)
+            new_task.add_voice_note_ui(voice_note_copy, update=False)
         # ... (copy other relevant attributes) ...
 
         # Add the new task to the parent container
-        self.parent_container.controls.append(new_task)
-        self.parent_container.update()
+        if self.task_add:
+            self.task_add(new_task)
+        else:
+            self.parent_container.controls.append(new_task)
+            self.parent_container.update()
         print(f"Duplicated task: {self.task_name}")
     #-------------------------------------------------------
     #-------------------------------------------------------
@@ -1170,6 +2759,36 @@ class VoiceTask(ft.UserControl):
         )
 
     def build_detail_view(self):
+        self.search_descriptions = ft.TextField(
+            # height=30,
+            hint_text="find descriptions...",
+            expand=True,
+            on_change=self.filter_descriptions,
+            prefix_icon=ft.icons.SEARCH,
+            bgcolor=ft.colors.BLUE_50,
+            border_radius=ft.border_radius.all(25),
+            border=ft.border.all(1, ft.colors.GREY_400),
+            text_style=ft.TextStyle(color=ft.colors.WHITE),
+            hint_style=ft.TextStyle(color=ft.colors.GREY_400),
+            color=ft.colors.BLACK,
+            autofocus=True,
+            autocorrect=True,
+            enable_suggestions=True,
+            capitalization=ft.TextCapitalization.SENTENCES,
+            cursor_width=2,
+            cursor_color=ft.colors.BLUE_600,
+            focused_border_color=ft.colors.BLUE_400,
+            focused_bgcolor=ft.colors.BLUE_100,
+            suffix_icon=ft.icons.CLEAR,
+            tooltip="Enter search terms",
+            keyboard_type=ft.KeyboardType.TEXT,
+            selection_color=ft.colors.BLUE_200,
+            # max_length=50,
+            # counter_text="0/50",
+            # helper_text="Search in task descriptions",
+            error_style=ft.TextStyle(color=ft.colors.RED_400),
+            dense=True
+        )
         return ft.Container(
             content=ft.Column([
                 
@@ -1265,114 +2884,6 @@ class VoiceTask(ft.UserControl):
             items=menu_items
         )
         
-    def toggle_expand(self, e):
-        self.expanded = not self.expanded
-        self.expand_button.icon = ft.icons.EXPAND_LESS if self.expanded else ft.icons.EXPAND_MORE
-        self.detail_view.visible = self.expanded
-        self.update()
-
-    def toggle_playback(self, voice_note):
-        play_button, pause_button, resume_button = self.play_pause_buttons[voice_note]
-        if not voice_note.is_playing:
-            self.start_playback(voice_note)
-            play_button.visible = False
-            pause_button.visible = True
-            resume_button.visible = False
-        elif voice_note.is_paused:
-            self.resume_playback(voice_note)
-            play_button.visible = False
-            pause_button.visible = True
-            resume_button.visible = False
-        else:
-            self.pause_playback(voice_note)
-            play_button.visible = False
-            pause_button.visible = False
-            resume_button.visible = True
-        self.update()
-
-    def start_playback(self, voice_note):
-        voice_note.is_playing = True
-        voice_note.is_paused = False
-        voice_note.start_time = time.time()
-        audio_to_play = voice_note.audio_data.flatten()[voice_note.playback_position:]
-        sd.play(audio_to_play, voice_note.fs)
-        self.update()
-
-        threading.Thread(target=self.monitor_playback, args=(voice_note,), daemon=True).start()
-        threading.Thread(target=self.update_playback_time, args=(voice_note,), daemon=True).start()
-
-        self.play_pause_button.visible = False
-        self.pause_button.visible = True
-        self.resume_button.visible = False
-        self.update()
-        
-    def pause_playback(self, voice_note):
-        if sd.get_stream() is not None:
-            elapsed_time = time.time() - voice_note.start_time
-            voice_note.playback_position += int(elapsed_time * voice_note.fs)
-        sd.stop()
-        voice_note.is_playing = False
-        voice_note.is_paused = True
-        voice_note.pause_time = time.time()
-        self.update_time_display(voice_note)
-        self.update()
-
-        self.play_pause_button.visible = False
-        self.pause_button.visible = False
-        self.resume_button.visible = True
-        self.update()
-        
-    def resume_playback(self, voice_note):
-        voice_note.is_playing = True
-        voice_note.is_paused = False
-        voice_note.start_time = time.time() - (voice_note.pause_time - voice_note.start_time)
-        audio_to_play = voice_note.audio_data.flatten()[voice_note.playback_position:]
-        sd.play(audio_to_play, voice_note.fs)
-        self.update()
-
-        threading.Thread(target=self.monitor_playback, args=(voice_note,), daemon=True).start()
-        threading.Thread(target=self.update_playback_time, args=(voice_note,), daemon=True).start()
-
-        play_button, pause_button, resume_button = self.play_pause_buttons[voice_note]
-        play_button.visible = False
-        pause_button.visible = True
-        resume_button.visible = False
-        self.update()
-        
-    def monitor_playback(self, voice_note):
-        while voice_note.is_playing and sd.get_stream().active:
-            time.sleep(0.1)
-
-        if voice_note.is_playing:
-            voice_note.is_playing = False
-            voice_note.playback_position = 0
-            voice_note.current_time = 0
-            asyncio.run_coroutine_threadsafe(self.update_play_button(voice_note), self.page.loop)
-            
-    async def update_play_button(self, voice_note):
-        play_button, pause_button, resume_button = self.play_pause_buttons[voice_note]
-        play_button.visible = True
-        pause_button.visible = False
-        resume_button.visible = False
-        self.update()
-
-    def update_playback_time(self, voice_note):
-        start_time = time.time()
-        while voice_note.is_playing:
-            voice_note.current_time = voice_note.playback_position / voice_note.fs + (time.time() - start_time)
-            self.update_time_display(voice_note)
-            time.sleep(0.1)  # Update every 100ms for smoother display
-            
-    def update_time_display(self, voice_note):
-        for control in self.voice_notes_container.controls:
-            if control.data == voice_note:
-                time_display = control.content.controls[-1]  # Assuming the time display is the last control in the row
-                current_time = self.format_time(voice_note.current_time)
-                total_time = self.format_time(voice_note.duration)
-                time_display.value = f"{current_time} / {total_time}"
-                self.page.update()
-                break
-
     def toggle_recording(self, e):
         if not self.is_recording:
             self.start_recording()
@@ -1381,40 +2892,89 @@ class VoiceTask(ft.UserControl):
 
     def start_recording(self):
         self.is_recording = True
-        self.audio_data = []
+        self.record_frames = 0
         try:
-            self.record_generator = record_audio(fs=self.fs, device=self.input_device)
+            if self.record_to_disk:
+                self.record_buffer = None
+                self.open_record_file()
+            else:
+                self.record_buffer = RecordingBuffer(block_frames=self.fs * 10)
+            self.record_generator = record_audio(fs=self.fs, device=self.input_device, buffer=self.record_buffer)
+            self.live_waveform_view.reset()
+            self.record_peaks = PeakBuilder()
+            self.record_embedding = EmbeddingBuilder(self.fs)
             self.record_thread = threading.Thread(target=self._record_audio, daemon=True)
             self.record_thread.start()
 
             self.record_button.icon = ft.icons.STOP
             self.record_button.tooltip = "Stop Recording"
             self.volume_bar.visible = True  # Ensure volume bar is visible
+            self.live_waveform_container.visible = True
             self.update()
         except Exception as e:
             print(f"Error during recording: {e}")
             self.is_recording = False
+            self.close_record_file()
             self.volume_bar.visible = False  # Hide volume bar if recording fails
+            self.live_waveform_container.visible = False
             self.update()
 
     def stop_recording(self):
         self.is_recording = False
         self.record_thread.join()
+        self.record_generator.close()  # Closes the input stream
+        record_path = self.record_path
+        self.close_record_file()
 
         self.record_button.icon = ft.icons.MIC
         self.record_button.tooltip = "Record Voice Note"
         self.volume_bar.visible = False  # Hide volume bar when recording stops
-
-        if len(self.audio_data) > 0:
-            audio_data = np.concatenate(self.audio_data)
-            voice_note = VoiceNote(audio_data, self.fs)
-            self.voice_notes.append(voice_note)
-            self.add_voice_note_ui(voice_note)
+        self.live_waveform_container.visible = False
+        if self.record_buffer is not None and self.record_buffer.dropped:
+            print(f"Recording dropped {self.record_buffer.dropped} frames: no spare block was ready", file=sys.stderr)
+
+        if self.record_frames > 0:
+            # Wrapping the take and encoding run on the worker
+            VOICE_NOTE_WORKER.submit(
+                self.finish_recording, self.record_buffer, record_path, self.record_peaks.finish(),
+                self.record_embedding.finish(), self.storage_codec
+            )
         else:
+            if record_path and os.path.exists(record_path):
+                os.remove(record_path)
             print("No audio data recorded")
 
+        self.record_buffer = None
+        self.record_peaks = None
+        self.record_embedding = None
         self.update()  # Update the UI to reflect changes
 
+    def finish_recording(self, record_buffer, record_path, peaks, embedding, codec):
+        # Runs on VOICE_NOTE_WORKER
+        try:
+            if record_path:
+                voice_note = VoiceNote(None, self.fs, path=record_path, codec=codec)
+            else:
+                voice_note = VoiceNote(record_buffer.to_array(), self.fs)
+            voice_note.peaks = peaks
+            voice_note.embedding = embedding
+        except Exception as e:
+            print(f"Error finishing recording: {e}")
+            return
+        # Raw samples, before encoding; a disk-mode take is read from its file by the pool
+        TRANSCRIPTION_POOL.submit(voice_note, None if record_path else voice_note.audio_data, self.transcription_done)
+        voice_note.encode(codec)  # Before the note is published, so deleting it cannot race the encoder
+        self.app_page.loop.call_soon_threadsafe(self.show_recorded_note, voice_note)
+
+    def show_recorded_note(self, voice_note):
+        if self.deleted:
+            voice_note.release()  # The task went away while the take was finishing
+            return
+        self.voice_notes.append(voice_note)
+        VOICE_SIMILARITY_INDEX.add(voice_note, voice_note.embedding, owner=self)
+        self.add_voice_note_ui(voice_note, update=False)
+        self.request_update()
+
     # def _record_audio(self):
     #     while self.is_recording:
     #         chunk = next(self.record_generator)
@@ -1425,19 +2985,73 @@ class VoiceTask(ft.UserControl):
     #         self.volume_bar.value = volume
     #         self.volume_bar.update()
     
-    def _record_audio(self):
-        while self.is_recording:
-            chunk = next(self.record_generator)
-            self.audio_data.append(chunk)
+    def did_mount(self):
+        self.mounted = True
+        ticker = UiTicker.for_page(self.app_page)
+        for voice_note, label in self.time_displays.items():
+            if voice_note.is_playing:
+                ticker.track(voice_note, label, self.format_progress)
+
+    def will_unmount(self):
+        self.mounted = False
+        ticker = UiTicker.for_page(self.app_page)
+        for voice_note in self.time_displays:
+            ticker.untrack(voice_note)
+
+    def transcription_done(self, voice_note):
+        # Called on a transcription worker thread
+        self.app_page.run_task(self.show_transcript, voice_note)
+
+    async def show_transcript(self, voice_note):
+        voice_note_row = self.voice_note_rows.get(voice_note)
+        if voice_note_row is None:
+            return  # Deleted while it was being transcribed
+        voice_note_row.tooltip = voice_note.transcript
+        self.text_changed()
+        if self.mounted:
+            self.update()
+
+    def open_record_file(self):
+        os.makedirs(self.recordings_dir, exist_ok=True)
+        codec = AUDIO_CODECS[self.storage_codec]
+        self.record_path = os.path.join(
+            self.recordings_dir, f"voice_note_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}{codec.extension}"
+        )
+        self.record_file = sf.SoundFile(
+            self.record_path, mode='w', samplerate=self.fs, channels=1,
+            format=codec.format, subtype=codec.subtype
+        )
 
-            # Update volume meter
-            volume = np.abs(chunk).mean()
-            self.volume_bar.value = volume
-            self.volume_bar.update()
-            # Use asyncio.run_coroutine_threadsafe to update the UI from a separate thread
-            # asyncio.run_coroutine_threadsafe(self.volume_bar.update(), self.page.loop)
+    def close_record_file(self):
+        if self.record_file is not None:
+            self.record_file.close()
+        self.record_file = None
+        self.record_path = None
 
-    def add_voice_note_ui(self, voice_note):
+    def _record_audio(self):
+        # Runs on the record thread; in disk mode it is also the writer thread
+        last_refresh = 0
+        while self.is_recording:
+            chunk = next(self.record_generator)  # In memory mode already stored in self.record_buffer
+            if self.record_buffer is not None:
+                self.record_buffer.reserve()  # Next block is allocated here, not in the callback
+            if self.record_file is not None:
+                self.record_file.write(chunk)
+            self.record_frames += len(chunk)
+            self.live_waveform_view.push(chunk)
+            self.record_peaks.push(chunk)
+            self.record_embedding.push(chunk)
+
+            # Update volume meter and live waveform, throttled below the block rate
+            now = time.monotonic()
+            if now - last_refresh >= self.live_refresh_interval:
+                last_refresh = now
+                self.volume_bar.value = np.abs(chunk).mean()
+                self.live_waveform.src_base64 = self.live_waveform_view.render()
+                if self.mounted:  # The take keeps recording while the row is scrolled away
+                    self.app_page.update(self.volume_bar, self.live_waveform)
+
+    def add_voice_note_ui(self, voice_note, update=True):
         checkbox = ft.Checkbox(
             value=getattr(voice_note, 'is_important', False),
             on_change=lambda _: self.toggle_voice_note(voice_note),
@@ -1473,16 +3087,32 @@ class VoiceTask(ft.UserControl):
         # Store the buttons for this voice note
         self.play_pause_buttons[voice_note] = (play_button, pause_button, resume_button)
         
-        waveform = ft.Image(
-            src_base64=generate_waveform(voice_note.audio_data.flatten(), voice_note.fs),
-            fit=ft.ImageFit.FIT_WIDTH,
-            height=30,
+        self.waveform_views[voice_note] = (0, voice_note.frames)
+        waveform_image = ft.Image(
+            src_base64=self.render_note_waveform(voice_note),
+            fit=ft.ImageFit.FILL,
+            width=WAVEFORM_WIDTH,
+            height=WAVEFORM_HEIGHT,
+        )
+        self.waveform_images[voice_note] = waveform_image
+        # Tap to scrub, scroll to zoom, double tap to reset the zoom
+        waveform = ft.GestureDetector(
+            content=waveform_image,
+            on_tap_down=lambda e: self.scrub_voice_note(voice_note, e.local_x),
+            on_scroll=lambda e: self.zoom_waveform(voice_note, e.local_x, e.scroll_delta_y),
+            on_double_tap=lambda _: self.zoom_waveform(voice_note, 0, None),
         )
         delete_button = ft.IconButton(
             icon=ft.icons.DELETE,
             on_click=lambda _: self.delete_voice_note(voice_note),
             icon_size=18,
         )
+        similar_button = ft.IconButton(
+            icon=ft.icons.GRAPHIC_EQ,
+            tooltip="Similar notes",
+            on_click=lambda _: self.show_similar_notes(voice_note),
+            icon_size=18,
+        )
         
         total_time = self.format_time(voice_note.duration)
         time_display = ft.Text(f"00:00 / {total_time}", size=10, width=70)  # Fixed width
@@ -1501,6 +3131,7 @@ class VoiceTask(ft.UserControl):
                     content=waveform,
                     expand=True,  # This allows the waveform to expand and fill available space
                 ),
+                similar_button,
                 time_display,
                 delete_button
             ], 
@@ -1512,114 +3143,113 @@ class VoiceTask(ft.UserControl):
             border_radius=ft.border_radius.all(4),
             padding=5,
             margin=ft.margin.only(bottom=2),
+            tooltip=voice_note.transcript or None,
         )
         voice_note_row.data = voice_note
+        self.voice_note_rows[voice_note] = voice_note_row
+        self.time_displays[voice_note] = time_display
         self.voice_notes_container.controls.append(voice_note_row)
+        if update:
+            self.update()
+
+    def render_note_waveform(self, voice_note):
+        start, end = self.waveform_views[voice_note]
+        width, height = WAVEFORM_WIDTH * 2, WAVEFORM_HEIGHT * 2  # 2x for high-DPI screens
+        return WAVEFORM_CACHE.get(
+            (voice_note.audio_id, width, height, WAVEFORM_COLOR, start, end),
+            lambda: render_waveform(
+                *voice_note.build_peaks().columns(width, start, end), width=width, height=height, color=WAVEFORM_COLOR
+            ),
+        )
+
+    def scrub_voice_note(self, voice_note, x):
+        start, end = self.waveform_views[voice_note]
+        fraction = min(max(x / WAVEFORM_WIDTH, 0), 1)
+        PLAYBACK_ENGINE.seek(voice_note, start + fraction * (end - start))
+        self.update_time_display(voice_note)
         self.update()
 
+    def zoom_waveform(self, voice_note, x, scroll_delta):
+        # Zoom around the pointer; scroll_delta None resets to the whole note
+        start, end = self.waveform_views[voice_note]
+        if scroll_delta is None:
+            start, end = 0, voice_note.frames
+        else:
+            anchor = start + min(max(x / WAVEFORM_WIDTH, 0), 1) * (end - start)
+            scale = 0.8 if scroll_delta < 0 else 1.25
+            span = min(voice_note.frames, max(WAVEFORM_WIDTH, (end - start) * scale))
+            start = int(min(max(anchor - (anchor - start) * span / (end - start), 0), voice_note.frames - span))
+            end = int(start + span)
+        self.waveform_views[voice_note] = (start, end)
+        waveform_image = self.waveform_images[voice_note]
+        waveform_image.src_base64 = self.render_note_waveform(voice_note)
+        waveform_image.update()
+
     def toggle_playback(self, voice_note):
-        play_button, pause_button, resume_button = self.play_pause_buttons[voice_note]
         if not voice_note.is_playing:
-            self.start_playback(voice_note)
-            play_button.icon = ft.icons.PAUSE
-            play_button.icon_color = ft.colors.RED
-            resume_button.icon_color = ft.colors.GREY_400
-        elif voice_note.is_paused:
-            self.resume_playback(voice_note)
-            play_button.icon = ft.icons.PAUSE
-            play_button.icon_color = ft.colors.RED
-            resume_button.icon_color = ft.colors.GREY_400
+            if voice_note.is_paused:
+                self.resume_playback(voice_note)
+            else:
+                self.start_playback(voice_note)
         else:
             self.pause_playback(voice_note)
-            play_button.icon = ft.icons.PLAY_ARROW
-            play_button.icon_color = ft.colors.BLUE
-            resume_button.icon_color = ft.colors.GREEN
-        self.update()
 
     def start_playback(self, voice_note):
-        voice_note.is_playing = True
-        voice_note.is_paused = False
-        voice_note.start_time = time.time()
-        audio_to_play = voice_note.audio_data.flatten()[voice_note.playback_position:]
-        sd.play(audio_to_play, voice_note.fs)
-        self.update()
-
-        threading.Thread(target=self.monitor_playback, args=(voice_note,), daemon=True).start()
-        threading.Thread(target=self.update_playback_time, args=(voice_note,), daemon=True).start()
+        PLAYBACK_ENGINE.play(voice_note, on_stopped=self.playback_stopped)
+        UiTicker.for_page(self.app_page).track(voice_note, self.time_displays[voice_note], self.format_progress)
 
         play_button, pause_button, resume_button = self.play_pause_buttons[voice_note]
         play_button.icon = ft.icons.PAUSE
         play_button.icon_color = ft.colors.RED
         resume_button.icon_color = ft.colors.GREY_400
-        self.update()
+        self.request_update()
 
     def pause_playback(self, voice_note):
-        if sd.get_stream() is not None:
-            elapsed_time = time.time() - voice_note.start_time
-            voice_note.playback_position += int(elapsed_time * voice_note.fs)
-        sd.stop()
-        voice_note.is_playing = False
-        voice_note.is_paused = True
-        voice_note.pause_time = time.time()
+        PLAYBACK_ENGINE.pause(voice_note)
+        voice_note.current_time = voice_note.playback_position / voice_note.fs
         self.update_time_display(voice_note)
-        self.update()
 
         play_button, pause_button, resume_button = self.play_pause_buttons[voice_note]
         play_button.icon = ft.icons.PLAY_ARROW
         play_button.icon_color = ft.colors.BLUE
         resume_button.icon_color = ft.colors.GREEN
-        self.update()
+        self.request_update()
 
     def resume_playback(self, voice_note):
-        voice_note.is_playing = True
-        voice_note.is_paused = False
-        voice_note.start_time = time.time() - (voice_note.pause_time - voice_note.start_time)
-        audio_to_play = voice_note.audio_data.flatten()[voice_note.playback_position:]
-        sd.play(audio_to_play, voice_note.fs)
-        self.update()
-
-        threading.Thread(target=self.monitor_playback, args=(voice_note,), daemon=True).start()
-        threading.Thread(target=self.update_playback_time, args=(voice_note,), daemon=True).start()
-
-        play_button, pause_button, resume_button = self.play_pause_buttons[voice_note]
-        play_button.icon = ft.icons.PAUSE
-        play_button.icon_color = ft.colors.RED
-        resume_button.icon_color = ft.colors.GREY_400
-        self.update()
-
-    def monitor_playback(self, voice_note):
-        while voice_note.is_playing and sd.get_stream().active:
-            time.sleep(0.1)
+        # The engine continues from voice_note.playback_position
+        self.start_playback(voice_note)
 
-        if voice_note.is_playing:
-            voice_note.is_playing = False
-            voice_note.playback_position = 0
-            voice_note.current_time = 0
-            asyncio.run_coroutine_threadsafe(self.update_play_button(voice_note), self.page.loop)
+    def playback_stopped(self, voice_note):
+        # Called by the engine, possibly from the audio thread
+        asyncio.run_coroutine_threadsafe(self.update_play_button(voice_note), self.app_page.loop)
 
     async def update_play_button(self, voice_note):
+        if voice_note not in self.play_pause_buttons:
+            return
         play_button, pause_button, resume_button = self.play_pause_buttons[voice_note]
         play_button.icon = ft.icons.PLAY_ARROW
         play_button.icon_color = ft.colors.BLUE
-        resume_button.icon_color = ft.colors.GREY_400
-        self.update()
+        resume_button.icon_color = ft.colors.GREEN if voice_note.is_paused else ft.colors.GREY_400
+        voice_note.current_time = voice_note.playback_position / voice_note.fs
+        self.update_time_display(voice_note)
+        self.request_update()
 
-    def update_playback_time(self, voice_note):
-        start_time = time.time()
-        while voice_note.is_playing:
-            voice_note.current_time = voice_note.playback_position / voice_note.fs + (time.time() - start_time)
-            self.update_time_display(voice_note)
-            time.sleep(0.1)  # Update every 100ms for smoother display
+    def request_update(self, *controls):
+        # Sent together with every other update requested before the next loop
+        # tick; an unmounted row is sent in full when it is materialized again
+        if self.mounted:
+            UpdateScheduler.for_page(self.app_page).mark(*(controls or (self,)))
 
     def update_time_display(self, voice_note):
-        for control in self.voice_notes_container.controls:
-            if control.data == voice_note:
-                time_display = control.content.controls[-1]  # Assuming the time display is the last control in the row
-                current_time = self.format_time(voice_note.current_time)
-                total_time = self.format_time(voice_note.duration)
-                time_display.value = f"{current_time} / {total_time}"
-                self.page.update()
-                break
+        # Sent with the caller's next update
+        time_display = self.time_displays.get(voice_note)
+        if time_display is not None:
+            time_display.value = self.format_progress(voice_note)
+
+    def format_progress(self, voice_note):
+        current_time = self.format_time(voice_note.playback_position / voice_note.fs)
+        total_time = self.format_time(voice_note.duration)
+        return f"{current_time} / {total_time}"
 
     def format_time(self, seconds):
         minutes, seconds = divmod(int(seconds), 60)
@@ -1628,44 +3258,85 @@ class VoiceTask(ft.UserControl):
     def toggle_voice_note(self, voice_note):
         voice_note.is_important = not getattr(voice_note, 'is_important', False)
         
-        for control in self.voice_notes_container.controls:
-            if control.data == voice_note:
-                checkbox = control.content.controls[0]  # Assuming checkbox is the first control
-                checkbox.value = voice_note.is_important
-                checkbox.shape = ft.CircleBorder()  # Ensure the checkbox remains rounded
-                
-                if voice_note.is_important:
-                    control.bgcolor = ft.colors.AMBER_100
-                    control.border = ft.border.all(2, ft.colors.AMBER)
-                else:
-                    control.bgcolor = ft.colors.BLUE_50
-                    control.border = ft.border.all(1, ft.colors.BLUE_200)
-                
-                # Update the star icon
-                star_icon = control.content.controls[1]  # Assuming star icon is the second control
-                star_icon.icon = ft.icons.STAR if voice_note.is_important else ft.icons.STAR_BORDER
-                star_icon.icon_color = ft.colors.AMBER if voice_note.is_important else ft.colors.GREY_400
-                
-                break
+        control = self.voice_note_rows.get(voice_note)
+        if control is not None:
+            checkbox = control.content.controls[0]  # Assuming checkbox is the first control
+            checkbox.value = voice_note.is_important
+            checkbox.shape = ft.CircleBorder()  # Ensure the checkbox remains rounded
+            
+            if voice_note.is_important:
+                control.bgcolor = ft.colors.AMBER_100
+                control.border = ft.border.all(2, ft.colors.AMBER)
+            else:
+                control.bgcolor = ft.colors.BLUE_50
+                control.border = ft.border.all(1, ft.colors.BLUE_200)
+            
+            # Update the star icon
+            star_icon = control.content.controls[1]  # Assuming star icon is the second control
+            star_icon.icon = ft.icons.STAR if voice_note.is_important else ft.icons.STAR_BORDER
+            star_icon.icon_color = ft.colors.AMBER if voice_note.is_important else ft.colors.GREY_400
         
         self.update()
         
         # Optional: Implement sorting based on importance
         self.sort_voice_notes()
 
+    def show_similar_notes(self, voice_note):
+        matches = VOICE_SIMILARITY_INDEX.query(voice_note, k=5)
+        if matches:
+            rows = [
+                ft.Text(
+                    f"{owner.full_task_name if owner else 'Unknown task'} - "
+                    f"{self.format_time(match.duration)} ({similarity:.0%} similar)"
+                )
+                for match, owner, similarity in matches
+            ]
+        else:
+            rows = [ft.Text("No other voice notes to compare with")]
+
+        similar_dialog = ft.AlertDialog(
+            title=ft.Text("Similar Voice Notes"),
+            content=ft.Column(rows, tight=True, spacing=10),
+            actions=[
+                ft.TextButton("Close", on_click=lambda _: self.close_dialog(similar_dialog)),
+            ],
+            actions_alignment=ft.MainAxisAlignment.END,
+        )
+        self.page.dialog = similar_dialog
+        similar_dialog.open = True
+        self.page.update()
+
     def delete_voice_note(self, voice_note):
         # Remove the voice note from the list if it exists
         if voice_note in self.voice_notes:
             self.voice_notes.remove(voice_note)
+            self.discard_voice_note(voice_note)
         
         # Remove the corresponding UI control
-        for control in self.voice_notes_container.controls[:]:
-            if control.data == voice_note:
-                self.voice_notes_container.controls.remove(control)
-                break
+        control = self.voice_note_rows.pop(voice_note, None)
+        if control is not None:
+            self.voice_notes_container.controls.remove(control)
+        self.time_displays.pop(voice_note, None)
+        self.play_pause_buttons.pop(voice_note, None)
+        self.waveform_images.pop(voice_note, None)
+        self.waveform_views.pop(voice_note, None)
         
         self.update()
 
+    def discard_voice_note(self, voice_note):
+        # Stops the note and drops every reference to its audio outside this task
+        if voice_note.is_playing:
+            PLAYBACK_ENGINE.pause(voice_note)
+        UiTicker.for_page(self.app_page).untrack(voice_note)
+        VOICE_SIMILARITY_INDEX.remove(voice_note)
+        voice_note.release()
+
+    def release_voice_notes(self):
+        # Called when the task itself is deleted
+        self.deleted = True
+        for voice_note in self.voice_notes:
+            self.discard_voice_note(voice_note)
+
     def show_date_picker(self, e):
         if not self.due_date_picker:
             self.due_date_picker = ft.DatePicker(
@@ -1679,15 +3350,27 @@ class VoiceTask(ft.UserControl):
         self.page.update()
 
     def set_due_date(self, e):
-        if e.control.value:
-            self.due_date = e.control.value.date()
-            self.display_task.label = f"{self.task_name} (Due: {self.due_date.strftime('%Y-%m-%d')})"
-        else:
-            self.due_date = None
-            self.display_task.label = self.task_name
+        self.apply_due_date(e.control.value.date() if e.control.value else None)
         self.due_date_picker.open = False
         self.update()
 
+    def apply_due_date(self, due_date):
+        # Sent with the caller's next update
+        self.due_date = due_date
+        if due_date:
+            self.display_task.label = f"{self.task_name} (Due: {due_date.strftime('%Y-%m-%d')})"
+        else:
+            self.display_task.label = self.task_name
+
+    def select_clicked(self, e):
+        if self.task_select:
+            self.task_select(self)
+
+    def set_selected(self, selected):
+        # Sent with the caller's next update
+        self.select_button.icon = ft.icons.CHECK_BOX if selected else ft.icons.CHECK_BOX_OUTLINE_BLANK
+        self.select_button.icon_color = ft.colors.BLUE if selected else None
+
     def edit_clicked(self, e):
         self.edit_name.value = self.task_name
         self.display_view.visible = False
@@ -1698,11 +3381,22 @@ class VoiceTask(ft.UserControl):
         new_name = self.edit_name.value
         if new_name and new_name != self.task_name:
             self.task_name = new_name
+            self.full_task_name = new_name
             self.display_task.label = self.task_name
+            self.text_changed()
         self.display_view.visible = True
         self.edit_view.visible = False
         self.update()
 
+    def text_changed(self):
+        if self.task_text_change:
+            self.task_text_change(self)
+
+    def search_text(self):
+        # Everything the task search indexes
+        transcripts = [voice_note.transcript for voice_note in self.voice_notes if voice_note.transcript]
+        return " ".join([self.full_task_name, *self.descriptions, *transcripts])
+
     def status_changed(self, e):
         self.task_status_change(self)
 
@@ -1838,6 +3532,7 @@ class VoiceTask(ft.UserControl):
             else:  # Adding new description
                 self.descriptions.append(description_text)
             self.update_descriptions_ui()
+            self.text_changed()
         self.close_description_dialog()
         self.page.update()  # Update the entire page to reflect changes
 
@@ -1880,6 +3575,7 @@ class VoiceTask(ft.UserControl):
         if 0 <= index < len(self.descriptions):
             self.descriptions.pop(index)
             self.update_descriptions_ui()
+            self.text_changed()
         else:
             print(f"Invalid index: {index}")
 
@@ -1891,9 +3587,6 @@ class VoiceTask(ft.UserControl):
         self.formatting.append((tag, value))
         self.update_description_preview()
 
-    def update_description(self, e):
-        self.description = self.description_field.value
-        self.update_description_preview()
     def update_description_preview(self):
         if self.description:
             formatted_preview = self.render_formatted_text(self.description)
@@ -2031,17 +3724,19 @@ class VoiceTask(ft.UserControl):
                 
     def close_dialog(self, dialog):
         dialog.open = False
-        self.page.update()
+        self.request_update(self.page)
         
     def set_priority(self, e):
         self.current_priority = e.control.text
         self.update_task_color()
 
-    def update_task_color(self):
+    def update_task_color(self, update=True):
         color = self.priority_colors[self.current_priority]
         self.display_task.label_style = ft.TextStyle(color=color, weight=ft.FontWeight.BOLD)
-        self.priority_dropdown.icon_color = color
-        self.update()
+        if self.priority_dropdown.current:
+            self.priority_dropdown.current.icon_color = color
+        if update:
+            self.update()
     
     def update_background(self):
         if isinstance(self.task_background, ft.Image):
@@ -2056,15 +3751,16 @@ class VoiceTask(ft.UserControl):
             if isinstance(control, ft.Container):
                 control.bgcolor = ft.colors.with_opacity(0.7, ft.colors.WHITE)
 
-        self.update()
+        self.request_update()
 
 
 # End of VoiceTask class
 
 
 class TodoApp(ft.UserControl):
-    def __init__(self):
+    def __init__(self, virtualized=False):
         super().__init__()
+        self.virtualized = virtualized  # Only materialize task rows near the viewport
         self.new_task = ft.TextField(
             hint_text="What needs to be done?",
             expand=True,
@@ -2098,20 +3794,83 @@ class TodoApp(ft.UserControl):
             # on_submit=self.search_tasks,
         )
         
-        self.tasks = ft.Column()
+        self.tasks = VirtualTaskList() if virtualized else ft.Column()
         self.filter = ft.Tabs(
             selected_index=0,
             on_change=self.tabs_changed,
             tabs=[ft.Tab(text="all"), ft.Tab(text="active"), ft.Tab(text="completed")],
         )
+        self.sort_key = "created_at"
+        self.sort_dropdown = ft.Dropdown(
+            label="Sort by",
+            value=self.sort_key,
+            options=[
+                ft.dropdown.Option(key="created_at", text="Added"),
+                ft.dropdown.Option(key="priority", text="Priority"),
+                ft.dropdown.Option(key="due_date", text="Due date"),
+            ],
+            on_change=self.sort_changed,
+            width=150,
+            dense=True,
+        )
+        self.task_for_record = {}  # task_id -> VoiceTask
         self.items_left = ft.Text("0 items left")
         self.theme_switch = ft.Switch(label="Sombre", on_change=self.theme_changed)
         self.input_device = None
         self.output_device = None
         self.fs = 44100
+        self.record_to_disk = False
+        self.storage_codec = "float32"
         
-        self.dashboard_dialog = None
-        self.create_dashboard_dialog()
+        self.search_index = SearchIndex()
+        self.fuzzy_index = TrigramIndex()
+        self.search_ranking = []  # [(task, score)] when showing fuzzy matches
+        self.search_hint = ft.Text("", size=12, italic=True, color=ft.colors.GREY_600, visible=False)
+        self.search_results = None  # Tasks matching the search field, None when it is empty
+        self.search_session = None  # Needs the page, created in did_mount
+        self.store = TaskStore()  # Plain task records behind the controls
+        self.store.on_reorder = self.record_reordered
+        self.in_bulk = False  # Bulk edits lay the list out once at the end
+        self.event_log = TaskEventLog()  # Add, completion and delete history
+        self.selected_tasks = set()  # Targets of the bulk actions
+        self.bulk_date_picker = None
+        self.selection_count = ft.Text("")
+        self.selection_bar = ft.Row(
+            visible=False,
+            controls=[
+                self.selection_count,
+                ft.IconButton(
+                    icon=ft.icons.DONE_ALL,
+                    tooltip="Complete selected",
+                    on_click=lambda _: self.bulk_complete(self.selected_tasks),
+                ),
+                ft.PopupMenuButton(
+                    icon=ft.icons.FLAG,
+                    tooltip="Set priority of selected",
+                    items=[
+                        ft.PopupMenuItem(text=priority, on_click=lambda e: self.bulk_set_priority(self.selected_tasks, e.control.text))
+                        for priority in PRIORITIES
+                    ],
+                ),
+                ft.IconButton(
+                    icon=ft.icons.CALENDAR_TODAY,
+                    tooltip="Set due date of selected",
+                    on_click=self.show_bulk_date_picker,
+                ),
+                ft.IconButton(
+                    icon=ft.icons.DELETE,
+                    tooltip="Delete selected",
+                    on_click=lambda _: self.bulk_delete(self.selected_tasks),
+                ),
+                ft.IconButton(
+                    icon=ft.icons.CLOSE,
+                    tooltip="Clear selection",
+                    on_click=lambda _: self.clear_selection(),
+                ),
+            ],
+        )
+
+        self.dashboard_dialog = None  # Built the first time it is shown
     #------------------------------------------------------
 
     def build(self):
@@ -2143,8 +3902,10 @@ class TodoApp(ft.UserControl):
                     ],
                 ),
                 
-                self.filter,
-                self.tasks,
+                self.search_hint,
+                ft.Row([ft.Container(content=self.filter, expand=True), self.sort_dropdown]),
+                self.selection_bar,
+                self.tasks.view if self.virtualized else self.tasks,
                 ft.Row(
                     alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
                     vertical_alignment=ft.CrossAxisAlignment.CENTER,
@@ -2158,6 +3919,9 @@ class TodoApp(ft.UserControl):
             ],
         )
     
+    def did_mount(self):
+        self.search_session = SearchSession(self.page, self.search_index, self.show_search_results)
+
     def toggle_search(self, e):
         self.search_field.visible = not self.search_field.visible
         self.search_button.icon = ft.icons.CLOSE if self.search_field.visible else ft.icons.SEARCH
@@ -2173,123 +3937,262 @@ class TodoApp(ft.UserControl):
         self.search_tasks(None)  # Reset search results
         self.update()
     def search_tasks(self, e):
-        search_term = self.search_field.value.lower()
-        for task in self.tasks.controls:
-            task.visible = self.task_matches_search(task, search_term)
-        self.update()    
+        if self.search_field.value:
+            self.search_session.submit(self.search_field.value)
+        else:
+            self.search_session.reset()
+            self.show_search_results(None)
+
+    def show_search_results(self, search_results, update=True):
+        had_ranking = bool(self.search_ranking)
+        self.search_ranking = []
+        if search_results is not None and not search_results:
+            # No exact match, fall back to ranked typo-tolerant matches
+            self.search_ranking = self.fuzzy_index.search(self.search_field.value)
+            search_results = {task for task, score in self.search_ranking}
+        if self.search_ranking:
+            closest = ", ".join(task.full_task_name for task, score in self.search_ranking[:3])
+            self.search_hint.value = f"No exact match. Closest: {closest}"
+        self.search_hint.visible = bool(self.search_ranking)
+        self.search_results = search_results
+        relayout = had_ranking or bool(self.search_ranking)
+        if relayout:
+            self.layout_tasks()
+        if update:
+            self.refresh_visibility(relayout)
+
+    def task_text_change(self, task):
+        self.search_index.update(task, task.search_text())
+        self.fuzzy_index.update(task, task.search_text())
+        if self.search_field.value:
+            self.rerun_search()
+
+    def rerun_search(self, update=True):
+        # Cached results may be stale after an index change, so re-run the full query
+        search_results = self.search_index.search(self.search_field.value)
+        self.search_session.remember(self.search_field.value, search_results)
+        self.show_search_results(search_results, update)
     def add_clicked(self, e):
         print("Add button clicked")  # Debug print
         if self.new_task.value:
             print(f"Adding new task: {self.new_task.value}")  # Debug print
-            task = VoiceTask(self.page, self.new_task.value, self.task_delete, self.task_status_change, self.tasks, self.handle_dismissal)
-            task.input_device = self.input_device
-            task.fs = self.fs
-            self.tasks.controls.append(task)
+            task = VoiceTask(
+                self.page, self.new_task.value, self.task_delete, self.task_status_change,
+                self.tasks, self.handle_dismissal, self.task_text_change, self.add_task,
+                task_select=self.task_select,
+            )
             self.new_task.value = ""
-            self.update()
+            self.add_task(task)
             print("Task added and UI updated")  # Debug print
         else:
             print("No task text entered")  # Debug print
 
+    def add_task(self, task):
+        task.input_device = self.input_device
+        task.fs = self.fs
+        task.record_to_disk = self.record_to_disk
+        task.storage_codec = self.storage_codec
+        self.search_index.update(task, task.search_text())
+        self.fuzzy_index.update(task, task.search_text())
+        searching = bool(self.search_field.value)
+        if searching:
+            self.rerun_search(update=False)  # The new task may match; visibility is set below
+        self.store.add(task.record)
+        self.event_log.record("added", task.record.task_id, 0 if task.completed else 1)
+        self.task_for_record[task.record.task_id] = task
+        task.visible = self.task_visible(task)
+        self.tasks.controls.append(task)
+        if self.sort_key != "created_at":
+            self.apply_sort()
+        if searching:
+            self.update()  # The results changed, so every task's visibility may have
+            return
+        self.items_left.value = self.items_left_text()
+        if self.virtualized:
+            self.tasks.refresh(update=False)
+        super().update()
+
     def handle_dismissal(self, e):
         print("Dismissal handled")
     
     def create_dashboard_dialog(self):
-        pie_chart = self.create_pie_chart()
-        bar_chart = self.create_bar_chart()
-        line_chart = self.create_line_chart()
+        # Native charts whose data points are updated in place by refresh_dashboard
+        self.status_sections = {
+            "Completed": ft.PieChartSection(0, color=ft.colors.GREEN, radius=100),
+            "Active": ft.PieChartSection(0, color=ft.colors.BLUE, radius=100),
+        }
+        pie_chart = ft.PieChart(
+            sections=list(self.status_sections.values()),
+            sections_space=2,
+            center_space_radius=0,
+            width=400,
+            height=300,
+        )
+        self.priority_rods = {
+            priority: ft.BarChartRod(from_y=0, to_y=0, width=24, color=PRIORITY_COLORS[priority], border_radius=0)
+            for priority in PRIORITIES
+        }
+        self.bar_chart = ft.BarChart(
+            bar_groups=[
+                ft.BarChartGroup(x=i, bar_rods=[self.priority_rods[priority]])
+                for i, priority in enumerate(PRIORITIES)
+            ],
+            bottom_axis=ft.ChartAxis(
+                labels=[
+                    ft.ChartAxisLabel(value=i, label=ft.Text(priority, size=10))
+                    for i, priority in enumerate(PRIORITIES)
+                ],
+                labels_size=32,
+            ),
+            left_axis=ft.ChartAxis(labels_size=32, title=ft.Text("Number of Tasks"), title_size=20),
+            interactive=True,
+            width=400,
+            height=300,
+        )
+        # Static renders, shown from DASHBOARD_RENDERER's last result until a fresh one arrives
+        self.dashboard_images = {
+            name: ft.Image(src_base64="", width=400, height=300)
+            for name in ("status", "priority", "due")
+        }
+        self.due_series = ft.LineChartData(stroke_width=3, color=ft.colors.BLUE, curved=False)
+        self.line_chart = ft.LineChart(
+            data_series=[self.due_series],
+            left_axis=ft.ChartAxis(labels_size=32, title=ft.Text("Cumulative Number of Tasks"), title_size=20),
+            bottom_axis=ft.ChartAxis(labels_size=32, title=ft.Text("Due Date"), title_size=20),
+            width=400,
+            height=300,
+        )
+
+        # History from the event log's rollups; one rod per day of the last two weeks
+        self.throughput_rods = [
+            ft.BarChartRod(from_y=0, to_y=0, width=16, color=ft.colors.GREEN, border_radius=0) for _ in range(14)
+        ]
+        self.throughput_labels = [ft.ChartAxisLabel(value=i, label=ft.Text("", size=10)) for i in range(len(self.throughput_rods))]
+        self.throughput_chart = ft.BarChart(
+            bar_groups=[ft.BarChartGroup(x=i, bar_rods=[rod]) for i, rod in enumerate(self.throughput_rods)],
+            left_axis=ft.ChartAxis(labels_size=32, title=ft.Text("Completed per Day"), title_size=20),
+            bottom_axis=ft.ChartAxis(labels=self.throughput_labels, labels_size=32),
+            width=400,
+            height=300,
+        )
+        self.burn_down_series = ft.LineChartData(stroke_width=3, color=ft.colors.RED, curved=False)
+        self.burn_down_chart = ft.LineChart(
+            data_series=[self.burn_down_series],
+            left_axis=ft.ChartAxis(labels_size=32, title=ft.Text("Open Tasks"), title_size=20),
+            bottom_axis=ft.ChartAxis(labels_size=32),
+            width=400,
+            height=300,
+        )
+        self.heatmap_cells = [
+            [ft.Container(width=12, height=12, bgcolor=ft.colors.GREY_200, tooltip=f"{day} {hour:02d}:00")
+             for hour in range(24)]
+            for day in ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+        ]
+        heatmap = ft.Column(
+            [ft.Row(cells, spacing=2) for cells in self.heatmap_cells],
+            spacing=2,
+        )
 
+        self.dashboard_tabs = ft.Tabs(
+            selected_index=0,
+            animation_duration=300,
+            on_change=self.dashboard_tab_changed,
+            tabs=[
+                ft.Tab(text="Pie Chart", content=pie_chart),
+                ft.Tab(text="Bar Chart", content=self.bar_chart),
+                ft.Tab(text="Line Chart", content=self.line_chart),
+                ft.Tab(text="Throughput", content=self.throughput_chart),
+                ft.Tab(text="Burn-down", content=self.burn_down_chart),
+                ft.Tab(text="Completion Heatmap", content=heatmap),
+                ft.Tab(text="Images", content=ft.Column(list(self.dashboard_images.values()), scroll=ft.ScrollMode.AUTO)),
+            ],
+            expand=1
+        )
         self.dashboard_dialog = ft.AlertDialog(
             title=ft.Text("Dashboard"),
-            content=ft.Tabs(
-                selected_index=0,
-                animation_duration=300,
-                tabs=[
-                    ft.Tab(text="Pie Chart", content=pie_chart),
-                    ft.Tab(text="Bar Chart", content=bar_chart),
-                    ft.Tab(text="Line Chart", content=line_chart),
-                ],
-                expand=1
-            ),
+            content=self.dashboard_tabs,
             actions=[
                 ft.TextButton("Close", on_click=self.close_dashboard_dialog),
             ],
         )
 
-    def create_pie_chart(self):
-        fig, ax = plt.subplots()
-        tasks = [task for task in self.tasks.controls if isinstance(task, VoiceTask)]
-        statuses = ['Completed', 'Active']
-        sizes = [
-            len([task for task in tasks if task.display_task.value]),
-            len([task for task in tasks if not task.display_task.value])
-        ]
-        
-        # Check if there are any tasks
-        if sum(sizes) == 0:
-            ax.text(0.5, 0.5, 'No tasks', horizontalalignment='center', verticalalignment='center')
-            ax.axis('off')
-        else:
-            # Remove any zero values to avoid the error
-            non_zero_sizes = [size for size in sizes if size > 0]
-            non_zero_statuses = [status for status, size in zip(statuses, sizes) if size > 0]
-            
-            ax.pie(non_zero_sizes, labels=non_zero_statuses, autopct='%1.1f%%', startangle=90)
-        
-        ax.axis('equal')
-        
-        buf = BytesIO()
-        fig.savefig(buf, format="png")
-        buf.seek(0)
-        img_base64 = base64.b64encode(buf.getvalue()).decode()
-        plt.close(fig)
-
-        return ft.Image(src_base64=img_base64, width=400, height=300)
-
-    def create_bar_chart(self):
-        # Create and return a bar chart
-        fig, ax = plt.subplots()
-        tasks = [task for task in self.tasks.controls if isinstance(task, VoiceTask)]
-        priorities = list(tasks[0].priority_colors.keys()) if tasks else []
-        counts = [len([task for task in tasks if task.current_priority == priority]) for priority in priorities]
-        
-        ax.bar(priorities, counts)
-        ax.set_ylabel('Number of Tasks')
-        ax.set_title('Tasks by Priority')
-        
-        buf = BytesIO()
-        fig.savefig(buf, format="png")
-        buf.seek(0)
-        img_base64 = base64.b64encode(buf.getvalue()).decode()
-        plt.close(fig)
-
-        return ft.Image(src_base64=img_base64, width=400, height=300)
-
-    def create_line_chart(self):
-        # Create and return a line chart
-        fig, ax = plt.subplots()
-        tasks = [task for task in self.tasks.controls if isinstance(task, VoiceTask)]
-        tasks_with_due_dates = [task for task in tasks if task.due_date]
-        tasks_with_due_dates.sort(key=lambda x: x.due_date)
-        
-        dates = [task.due_date for task in tasks_with_due_dates]
-        cumulative_tasks = list(range(1, len(dates) + 1))
-        
-        ax.plot(dates, cumulative_tasks)
-        ax.set_xlabel('Due Date')
-        ax.set_ylabel('Cumulative Number of Tasks')
-        ax.set_title('Task Accumulation Over Time')
-        
-        buf = BytesIO()
-        fig.savefig(buf, format="png")
-        buf.seek(0)
-        img_base64 = base64.b64encode(buf.getvalue()).decode()
-        plt.close(fig)
-
-        return ft.Image(src_base64=img_base64, width=400, height=300)
+    def refresh_dashboard(self, status_only=False):
+        # Copies the store's aggregates into the chart data points in place,
+        # so flet only sends the values that changed. A status flip cannot
+        # move the priority or due date charts, so status_only skips them.
+        counts = {"Completed": self.store.completed_count, "Active": self.store.active_count}
+        total = len(self.store)
+        for status, section in self.status_sections.items():
+            section.value = counts[status]
+            section.title = f"{status}\n{counts[status] / total:.1%}" if counts[status] else ""
+        self.refresh_history_charts()
+        if not status_only:
+            self.refresh_task_charts()
+        if DASHBOARD_RENDERER.latest:
+            self.set_dashboard_images(DASHBOARD_RENDERER.latest)
+        if self.images_tab_selected():
+            self.request_dashboard_images()
+
+    def refresh_task_charts(self):
+        priority_counts = self.store.priority_counts()
+        for priority, rod in self.priority_rods.items():
+            rod.to_y = priority_counts[priority]
+        self.bar_chart.max_y = max(priority_counts.values(), default=0) + 1
+
+        series = self.store.due_date_series()
+        sync_line_points(self.due_series, [(day.toordinal(), total) for day, total in series])
+        sync_day_labels(self.line_chart.bottom_axis, [series[0][0], series[-1][0]] if series else [])
+
+    def refresh_history_charts(self):
+        # Rods, labels and points are updated in place; usually only today's move
+        throughput = self.event_log.throughput("daily", last=len(self.throughput_rods))
+        for rod, label, (day, count) in zip(self.throughput_rods, self.throughput_labels, throughput):
+            rod.to_y = count
+            label.label.value = day.strftime("%m-%d")
+        self.throughput_chart.max_y = max((count for day, count in throughput), default=0) + 1
+
+        burn_down = self.event_log.burn_down("daily")
+        sync_line_points(self.burn_down_series, [(day.toordinal(), remaining) for day, remaining in burn_down])
+        sync_day_labels(self.burn_down_chart.bottom_axis, [day for day, remaining in burn_down[:1] + burn_down[1:][-1:]])
+
+        busiest = max(max(hours) for hours in self.event_log.heatmap)
+        for hours, cells in zip(self.event_log.heatmap, self.heatmap_cells):
+            for count, cell in zip(hours, cells):
+                cell.bgcolor = ft.colors.with_opacity(count / busiest, ft.colors.GREEN) if count else ft.colors.GREY_200
+
+    def images_tab_selected(self):
+        # The static renders are only worth drawing while someone looks at them
+        return self.dashboard_tabs.tabs[self.dashboard_tabs.selected_index].text == "Images"
+
+    def dashboard_tab_changed(self, e):
+        if self.images_tab_selected():
+            self.request_dashboard_images()
+
+    def request_dashboard_images(self):
+        DASHBOARD_RENDERER.request(self.store.aggregates(), self.dashboard_images_ready)
+
+    def set_dashboard_images(self, images):
+        for name, image in self.dashboard_images.items():
+            image.src_base64 = images[name]
+
+    def dashboard_images_ready(self, images):
+        # Called from the render worker, or inline when the render was cached
+        self.page.loop.call_soon_threadsafe(self.show_dashboard_images, images)
+
+    def show_dashboard_images(self, images):
+        if self.dashboard_images["status"].src_base64 is images["status"]:
+            return  # Already showing this render
+        self.set_dashboard_images(images)
+        if self.dashboard_open():
+            self.page.update(*self.dashboard_images.values())
+
+    def dashboard_open(self):
+        return self.dashboard_dialog is not None and self.dashboard_dialog.open
 
     def show_dashboard_dialog(self, e):
-        self.create_dashboard_dialog()  # Recreate the dialog to update the charts
+        if self.dashboard_dialog is None:
+            self.create_dashboard_dialog()
+        self.refresh_dashboard()
         self.page.dialog = self.dashboard_dialog
         self.dashboard_dialog.open = True
         self.page.update()
@@ -2301,45 +4204,240 @@ class TodoApp(ft.UserControl):
     def task_delete(self, task):
         print(f"Deleting task: {task.task_name}")  # Debug print
         self.tasks.controls.remove(task)
+        self.forget_task(task)
+        if self.virtualized:
+            self.tasks.task_removed(task, update=False)
+        self.refresh_selection_bar()
+        self.send_task_changes([], self.tasks.view if self.virtualized else self.tasks, self.selection_bar)
+
+    def forget_task(self, task):
+        # Drops the task from the store, indexes and selection; the caller
+        # removes it from the list and updates
+        self.store.remove(task.record)
+        self.event_log.record("deleted", task.record.task_id, 0 if task.completed else -1)
+        self.task_for_record.pop(task.record.task_id, None)
+        self.selected_tasks.discard(task)
+        task.release_voice_notes()
+        self.search_index.remove(task)
+        self.fuzzy_index.remove(task)
+        self.search_session.discard(task)
+        if self.search_results is not None:
+            self.search_results.discard(task)
+        if self.search_ranking:
+            self.search_ranking = [(ranked, score) for ranked, score in self.search_ranking if ranked is not task]
+
+    def set_task_completed(self, task, completed):
+        if task.completed != bool(completed):
+            if completed:
+                self.event_log.record("completed", task.record.task_id, -1)
+            else:
+                self.event_log.record("reopened", task.record.task_id, 1)
+        self.store.set_completed(task.record, completed)
+
+    def send_task_changes(self, tasks, *extra, relayout=False, status_only=False):
+        # Restyles tasks whose state changed and sends them, extra controls,
+        # the counters and the dashboard in one update, without walking the
+        # rest of the list. relayout sends the whole list after its order or
+        # membership changed.
+        status, today = self.filter_status(), date.today()
+        for task in tasks:
+            task.visible = self.task_visible(task, status)
+            self.style_overdue(task, today)
+        self.items_left.value = self.items_left_text()
+        changed = [self.items_left, *extra, *self.task_view_updates([self.tasks] if relayout else tasks)]
+        if self.dashboard_open():
+            self.refresh_dashboard(status_only=status_only)
+            changed.append(self.dashboard_dialog)
+        self.page.update(*changed)
+
+    def relayout_if_sorted_by(self, order):
+        # Bulk edits skip record_reordered; lay the list out once if its order moved
+        if order == self.sort_key or self.search_ranking:
+            self.layout_tasks()
+            return True
+        return False
+
+    # Bulk operations mutate every task in one pass and send a single update.
+    # Locked tasks are skipped, as their own controls are disabled.
+    def unlocked(self, tasks):
+        return [task for task in tasks if not task.locked]
+
+    def bulk_delete(self, tasks):
+        doomed = set(self.unlocked(tasks))
+        if not doomed:
+            return
+        self.tasks.controls[:] = [task for task in self.tasks.controls if task not in doomed]
+        for task in doomed:
+            self.forget_task(task)
+        self.refresh_selection_bar()
+        self.send_task_changes([], self.selection_bar, relayout=True)
+
+    def bulk_complete(self, tasks, completed=True):
+        tasks = self.unlocked(tasks)
+        for task in tasks:
+            task.display_task.value = completed
+            self.set_task_completed(task, completed)
+        self.send_task_changes(tasks, status_only=True)
+
+    def bulk_set_priority(self, tasks, priority):
+        tasks = self.unlocked(tasks)
+        self.in_bulk = True
+        try:
+            for task in tasks:
+                task.current_priority = priority
+                task.update_task_color(update=False)
+        finally:
+            self.in_bulk = False
+        self.send_task_changes(tasks, relayout=self.relayout_if_sorted_by("priority"))
+
+    def bulk_set_due_date(self, tasks, due_date):
+        tasks = self.unlocked(tasks)
+        self.in_bulk = True
+        try:
+            for task in tasks:
+                task.apply_due_date(due_date)
+        finally:
+            self.in_bulk = False
+        self.send_task_changes(tasks, relayout=self.relayout_if_sorted_by("due_date"))
+
+    def show_bulk_date_picker(self, e):
+        if not self.bulk_date_picker:
+            self.bulk_date_picker = ft.DatePicker(
+                on_change=self.bulk_date_picked,
+                first_date=date.today(),
+                last_date=date(2050, 12, 31)
+            )
+            self.page.overlay.append(self.bulk_date_picker)
+        self.bulk_date_picker.open = True
+        self.page.update()
+
+    def bulk_date_picked(self, e):
+        self.bulk_date_picker.open = False
+        self.bulk_set_due_date(self.selected_tasks, e.control.value.date() if e.control.value else None)
+
+    def task_select(self, task):
+        if task in self.selected_tasks:
+            self.selected_tasks.discard(task)
+        else:
+            self.selected_tasks.add(task)
+        task.set_selected(task in self.selected_tasks)
+        self.refresh_selection_bar()
+        self.page.update(task.select_button, self.selection_bar)
+
+    def clear_selection(self):
+        for task in self.selected_tasks:
+            task.set_selected(False)
+        self.selected_tasks.clear()
+        self.refresh_selection_bar()
         self.update()
 
+    def refresh_selection_bar(self):
+        self.selection_count.value = f"{len(self.selected_tasks)} selected"
+        self.selection_bar.visible = bool(self.selected_tasks)
+
     def task_status_change(self, task):
-        self.update()
+        # Only this task's membership, style and visibility can change
+        self.set_task_completed(task, task.display_task.value)
+        self.send_task_changes([task], status_only=True)
 
     def tabs_changed(self, e):
-        self.update()
+        self.refresh_visibility()
+
+    def sort_changed(self, e):
+        # Only the order changes, not which tasks are shown or how they look
+        self.sort_key = self.sort_dropdown.value
+        self.layout_tasks()
+        self.page.update(*self.task_view_updates([self.tasks]))
+
+    def apply_sort(self):
+        # Reads the store's maintained order, O(n) with no sorting
+        self.tasks.controls[:] = [self.task_for_record[record.task_id] for record in self.store.ordered(self.sort_key)]
+
+    def layout_tasks(self):
+        # Fuzzy matches in BM25 rank order while they are shown, otherwise the sort order
+        self.apply_sort()
+        if self.search_ranking:
+            ranked = [task for task, score in self.search_ranking]
+            ranked_set = set(ranked)
+            self.tasks.controls[:] = ranked + [task for task in self.tasks.controls if task not in ranked_set]
+
+    def record_reordered(self, record, order):
+        # One task's priority or due date changed outside a bulk edit; move just its row
+        if order != self.sort_key or self.in_bulk or self.search_ranking:
+            return
+        task = self.task_for_record.get(record.task_id)
+        if task is None:
+            return
+        self.tasks.controls.remove(task)
+        self.tasks.controls.insert(self.store.position(order, record), task)
+        if self.virtualized:
+            self.tasks.task_moved(task, update=False)
+            UpdateScheduler.for_page(self.page).mark(self.tasks.view)
+        else:
+            UpdateScheduler.for_page(self.page).mark(self.tasks)
+
+    def filter_status(self):
+        return self.filter.tabs[self.filter.selected_index].text
+
+    def task_visible(self, task, status=None):
+        if not self.store.has_status(task.record, status or self.filter_status()):
+            return False
+        return self.search_results is None or task in self.search_results
+
+    def items_left_text(self):
+        return f"{self.store.active_count} active item(s) left"
+
+    def style_overdue(self, task, today):
+        if task.due_date and task.due_date < today and self.store.has_status(task.record, "active"):
+            task.display_task.style = ft.TextStyle(color=ft.colors.RED)
+        else:
+            task.display_task.style = None
+
+    def refresh_visibility(self, relayout=False):
+        # Send only the tasks whose visibility actually changed, or the whole
+        # list when its order changed too
+        status = self.filter_status()
+        changed = []
+        for task in self.tasks.controls:
+            visible = self.task_visible(task, status)
+            if task.visible != visible:
+                task.visible = visible
+                changed.append(task)
+        self.items_left.value = self.items_left_text()
+        self.page.update(self.items_left, self.search_hint, *self.task_view_updates([self.tasks] if relayout else changed))
+
+    def task_view_updates(self, tasks):
+        # Controls to send after the visibility or style of tasks changed;
+        # [self.tasks] means the whole list was reordered
+        if not self.virtualized:
+            return tasks
+        if self.tasks in tasks:
+            self.tasks.refresh(update=False)
+            return [self.tasks.view]
+        if self.tasks.tasks_changed(tasks, update=False):
+            return [self.tasks.view]
+        return [task for task in tasks if self.tasks.is_materialized(task)]
 
     def clear_completed_clicked(self, e):
-        for task in self.tasks.controls[:]:
-            if task.display_task.value:
-                self.task_delete(task)
+        self.bulk_delete([self.task_for_record[task_id] for task_id in self.store.status_ids["completed"]])
 
     def update(self):
-        status = self.filter.tabs[self.filter.selected_index].text
-        search_term = self.search_field.value.lower()
-        count = 0
+        self.layout_tasks()  # Also restores insertion order after switching back to "Added"
+        status = self.filter_status()
+        today = date.today()
         for task in self.tasks.controls:
-            task.visible = (
-                (status == "all"
-                or (status == "active" and not task.display_task.value)
-                or (status == "completed" and task.display_task.value))
-                and task.matches_search(search_term)
-            )
-            if not task.display_task.value:
-                count += 1
-
-            if task.due_date and task.due_date < date.today() and not task.display_task.value:
-                task.display_task.style = ft.TextStyle(color=ft.colors.RED)
-            else:
-                task.display_task.style = None
+            task.visible = self.task_visible(task, status)
+            self.style_overdue(task, today)
 
-        self.items_left.value = f"{count} active item(s) left"
+        self.items_left.value = self.items_left_text()
+        if self.virtualized:
+            self.tasks.refresh(update=False)
         
-        if self.dashboard_dialog and self.dashboard_dialog.open:
-            self.create_dashboard_dialog()  # Update the charts
-            self.page.dialog = self.dashboard_dialog
-            
-        super().update()
+        if self.dashboard_open():
+            self.refresh_dashboard()
+            self.page.update(self, self.dashboard_dialog)
+        else:
+            super().update()
 
     def theme_changed(self, e):
         self.page.theme_mode = (
@@ -2349,23 +4447,21 @@ class TodoApp(ft.UserControl):
         )
         self.page.update()
 
-    def task_matches_search(self, task, search_term):
-        if search_term in task.task_name.lower():
-            return True
-        for voice_note in task.voice_notes:
-            if search_term in voice_note.audio_data.tobytes().decode('utf-8', errors='ignore').lower():
-                return True
-        for description in task.descriptions:
-            if search_term in description.lower():
-                return True
-        return False
-
 def main(page: ft.Page):
     # page.debug = True
     page.title = "LeManager M App"
     page.horizontal_alignment = ft.CrossAxisAlignment.CENTER
     page.theme_mode = ft.ThemeMode.LIGHT
     todo = TodoApp()
+
+    def session_closed(e):
+        # The per-session registries would otherwise keep this page alive
+        scheduler = UpdateScheduler.for_page(page)
+        print(f"UI updates: {scheduler.requests} requested, {scheduler.flushes} sent, {scheduler.coalesced} coalesced")
+        UiTicker.forget_page(page)
+        UpdateScheduler.forget_page(page)
+
+    page.on_close = session_closed
     
     def handle_dismissal(e):
         print("Drawer dismissed")
@@ -2468,7 +4564,7 @@ def main(page: ft.Page):
         ),
     )
 
-    todo = TodoApp()
+    todo = TodoApp(virtualized=True)
 
     devices = get_audio_devices()
     input_devices = [d for d in devices if d['max_input_channels'] > 0]
@@ -2519,6 +4615,7 @@ def main(page: ft.Page):
     def on_output_change(e):
         selected_index = int(output_dropdown.value.split("Index: ")[-1][:-1])
         todo.output_device = selected_index
+        PLAYBACK_ENGINE.set_device(selected_index)
 
     def on_sample_rate_change(e):
         selected_rate = int(sample_rate_dropdown.value.split()[0])
@@ -2526,15 +4623,53 @@ def main(page: ft.Page):
         for task in todo.tasks.controls:
             task.fs = selected_rate
 
+    storage_codec_dropdown = ft.Dropdown(
+        label="Voice Note Storage",
+        options=[ft.dropdown.Option(name) for name in AUDIO_CODECS],
+        value="float32",
+        width=300,
+        icon=ft.icons.COMPRESS,
+    )
+
+    record_to_disk_switch = ft.Switch(label="Stream recordings to disk", value=False)
+
+    transcription_dropdown = ft.Dropdown(
+        label="Transcription",
+        options=[ft.dropdown.Option("off"), *(ft.dropdown.Option(name) for name in TRANSCRIPTION_BACKENDS)],
+        value="off",
+        width=300,
+        icon=ft.icons.RECORD_VOICE_OVER,
+        disabled=not TRANSCRIPTION_BACKENDS,  # No speech-to-text engine installed
+    )
+
+    def on_storage_codec_change(e):
+        todo.storage_codec = storage_codec_dropdown.value
+        for task in todo.tasks.controls:
+            task.storage_codec = storage_codec_dropdown.value
+
+    def on_record_to_disk_change(e):
+        todo.record_to_disk = record_to_disk_switch.value
+        for task in todo.tasks.controls:
+            task.record_to_disk = record_to_disk_switch.value
+
+    def on_transcription_change(e):
+        TRANSCRIPTION_POOL.set_backend(make_transcription_backend(transcription_dropdown.value))
+
     input_dropdown.on_change = on_input_change
     output_dropdown.on_change = on_output_change
     sample_rate_dropdown.on_change = on_sample_rate_change
+    record_to_disk_switch.on_change = on_record_to_disk_change
+    storage_codec_dropdown.on_change = on_storage_codec_change
+    transcription_dropdown.on_change = on_transcription_change
 
     page.add(
         ft.Column([
             input_dropdown,
             output_dropdown,
             sample_rate_dropdown,
+            storage_codec_dropdown,
+            record_to_disk_switch,
+            transcription_dropdown,
             todo,  # This is the only place where tasks should be managed
         ]),
         page.bottom_appbar,
@@ -2543,6 +4678,7 @@ def main(page: ft.Page):
     page.update()
 
 if __name__ == "__main__":
+    shutil.rmtree(AUDIO_SPILL_DIR, ignore_errors=True)  # Notes are not persisted, so old spills are orphans
     # ft.app(target=main)
     ft.app(target=main, assets_dir="assets", )
     # ft.app(target=main, port=8080, view=ft.WEB_BROWSER, assets_dir="assets")
@@ -0,0 +1,94 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+try:
+    import main
+except (ImportError, OSError) as e:  # flet missing, or sounddevice without PortAudio
+    pytest.skip(f"app dependencies unavailable: {e}", allow_module_level=True)
+
+
+class FakePage:
+    # Just enough of ft.Page for a task whose row is not mounted
+    session_id = "test"
+    loop = None
+
+    def update(self, *controls):
+        pass
+
+    def run_task(self, handler, *args):
+        asyncio.run(handler(*args))
+
+
+def record_take(seconds=2.5, fs=8000, block=512):
+    # Feeds a tone through the same buffer and builders as VoiceTask._record_audio
+    buffer = main.RecordingBuffer(block_frames=fs)  # Several arena blocks
+    peaks = main.PeakBuilder()
+    embedding = main.EmbeddingBuilder(fs)
+    t = np.arange(int(seconds * fs)) / fs
+    samples = (0.5 * np.sin(2 * np.pi * 440 * t)).astype(np.float32).reshape(-1, 1)
+    for start in range(0, len(samples), block):
+        for chunk in buffer.write(samples[start:start + block]):
+            peaks.push(chunk)
+            embedding.push(chunk)
+        buffer.reserve()
+    voice_note = main.VoiceNote(buffer.to_array(), fs)
+    voice_note.peaks = peaks.finish()
+    voice_note.embedding = embedding.finish()
+    return voice_note, samples
+
+
+@pytest.fixture
+def task():
+    search_index = main.SearchIndex()
+    fuzzy_index = main.TrigramIndex()
+
+    def task_text_change(task):
+        # As TodoApp.task_text_change
+        search_index.update(task, task.search_text())
+        fuzzy_index.update(task, task.search_text())
+
+    task = main.VoiceTask(FakePage(), "Groceries", None, None, None, None, task_text_change=task_text_change)
+    task.search_index = search_index
+    task.fuzzy_index = fuzzy_index
+    task_text_change(task)
+    yield task
+    task.release_voice_notes()
+
+
+def test_recorded_note_is_transcribed_and_found_by_search(task):
+    voice_note, samples = record_take()
+    assert np.array_equal(np.asarray(voice_note.audio_data), samples)
+    task.show_recorded_note(voice_note)
+    assert task.search_index.search("oat") == set()
+
+    pool = main.TranscriptionPool(main.StubTranscriptionBackend("buy oat milk"))
+    pool.submit(voice_note, voice_note.audio_data, task.transcription_done).result()
+
+    assert voice_note.transcript == "buy oat milk"
+    assert task.search_index.search("oat") == {task}
+    assert task.fuzzy_index.search("oat mlik")[0][0] is task
+
+
+def test_queued_job_keeps_its_backend():
+    voice_note, _ = record_take(seconds=0.5)
+    pool = main.TranscriptionPool(main.StubTranscriptionBackend("call the plumber"), max_workers=1)
+    done = []
+    future = pool.submit(voice_note, voice_note.audio_data, done.append)
+    pool.set_backend(None)  # Switched off in the settings while the job was queued
+    future.result()
+    assert done == [voice_note]
+    assert voice_note.transcript == "call the plumber"
+    assert pool.submit(voice_note, voice_note.audio_data, done.append) is None
+    voice_note.release()
+
+
+def test_stub_is_not_offered_in_the_settings():
+    assert "stub" not in main.TRANSCRIPTION_BACKENDS
+    assert isinstance(main.make_transcription_backend("stub"), main.StubTranscriptionBackend)
+    assert main.make_transcription_backend("off") is None